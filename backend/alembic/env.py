@@ -11,6 +11,8 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from app.db.base import Base
 from app.models.hero import Hero
+from app.models.job import Job
+from app.models.revoked_token import RevokedToken
 from app.core.config import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,24 @@
+"""Add heroes (created_at, id) index for keyset pagination
+
+Revision ID: 35920706f405
+Revises: 0f4d81446e86
+Create Date: 2025-09-02 19:12:37.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '35920706f405'
+down_revision = '0f4d81446e86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_heroes_created_at_id', 'heroes', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_heroes_created_at_id', table_name='heroes')
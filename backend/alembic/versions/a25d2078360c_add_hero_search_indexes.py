@@ -0,0 +1,60 @@
+"""Add full-text and trigram search indexes on heroes
+
+Revision ID: a25d2078360c
+Revises: b2550048bc6c
+Create Date: 2025-09-08 20:05:51.774310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a25d2078360c'
+down_revision = 'b2550048bc6c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # French stemming on accent-free words
+    op.execute("CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french)")
+    op.execute(
+        "ALTER TEXT SEARCH CONFIGURATION french_unaccent "
+        "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem"
+    )
+    # unaccent() is only STABLE; this wrapper pins the dictionary so it can be indexed
+    op.execute(
+        "CREATE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+    )
+
+    op.add_column('heroes', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('french_unaccent'::regconfig, coalesce(nickname, '')), 'A') || "
+            "setweight(to_tsvector('french_unaccent'::regconfig, coalesce(firstname, '') || ' ' || coalesce(lastname, '')), 'B') || "
+            "setweight(to_tsvector('french_unaccent'::regconfig, coalesce(description, '')), 'C')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_heroes_search_vector', 'heroes', ['search_vector'], unique=False, postgresql_using='gin')
+    op.execute(
+        "CREATE INDEX ix_heroes_nickname_trgm ON heroes "
+        "USING gin (f_unaccent(lower(nickname)) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_heroes_nickname_trgm', table_name='heroes')
+    op.drop_index('ix_heroes_search_vector', table_name='heroes')
+    op.drop_column('heroes', 'search_vector')
+    op.execute("DROP FUNCTION f_unaccent(text)")
+    op.execute("DROP TEXT SEARCH CONFIGURATION french_unaccent")
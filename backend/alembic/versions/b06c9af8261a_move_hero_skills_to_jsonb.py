@@ -0,0 +1,65 @@
+"""Move hero skills to JSONB with indexed average and maximum skill
+
+Revision ID: b06c9af8261a
+Revises: a25d2078360c
+Create Date: 2025-09-10 18:42:07.529164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b06c9af8261a'
+down_revision = 'a25d2078360c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'heroes', 'skills',
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        postgresql_using='skills::jsonb',
+    )
+
+    # Generated columns cannot use subqueries, so the aggregates over the skill
+    # levels live in IMMUTABLE functions. Non-numeric levels are ignored.
+    op.execute(
+        "CREATE FUNCTION hero_skill_avg(jsonb) RETURNS double precision "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+        "AS $$ SELECT coalesce(avg(value::text::double precision), 0) "
+        "FROM jsonb_each($1) WHERE jsonb_typeof(value) = 'number' $$"
+    )
+    op.execute(
+        "CREATE FUNCTION hero_skill_max(jsonb) RETURNS double precision "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+        "AS $$ SELECT coalesce(max(value::text::double precision), 0) "
+        "FROM jsonb_each($1) WHERE jsonb_typeof(value) = 'number' $$"
+    )
+    op.add_column('heroes', sa.Column(
+        'avg_skill', sa.Float(), sa.Computed('hero_skill_avg(skills)', persisted=True), nullable=True,
+    ))
+    op.add_column('heroes', sa.Column(
+        'max_skill', sa.Float(), sa.Computed('hero_skill_max(skills)', persisted=True), nullable=True,
+    ))
+
+    op.create_index('ix_heroes_skills', 'heroes', ['skills'], unique=False, postgresql_using='gin')
+    op.create_index('ix_heroes_avg_skill_id', 'heroes', ['avg_skill', 'id'], unique=False)
+    op.create_index('ix_heroes_max_skill_id', 'heroes', ['max_skill', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_heroes_max_skill_id', table_name='heroes')
+    op.drop_index('ix_heroes_avg_skill_id', table_name='heroes')
+    op.drop_index('ix_heroes_skills', table_name='heroes')
+    op.drop_column('heroes', 'max_skill')
+    op.drop_column('heroes', 'avg_skill')
+    op.execute("DROP FUNCTION hero_skill_max(jsonb)")
+    op.execute("DROP FUNCTION hero_skill_avg(jsonb)")
+    op.alter_column(
+        'heroes', 'skills',
+        type_=sa.JSON(),
+        postgresql_using='skills::json',
+    )
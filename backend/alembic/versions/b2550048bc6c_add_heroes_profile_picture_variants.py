@@ -0,0 +1,24 @@
+"""Add heroes.profile_picture_variants
+
+Revision ID: b2550048bc6c
+Revises: 35920706f405
+Create Date: 2025-09-04 21:37:05.112843
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2550048bc6c'
+down_revision = '35920706f405'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('heroes', sa.Column('profile_picture_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('heroes', 'profile_picture_variants')
@@ -0,0 +1,57 @@
+"""Prune hero tombstones once per DELETE statement
+
+Revision ID: c5b695e42efe
+Revises: da872337554b
+Create Date: 2025-09-18 10:47:03.215876
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5b695e42efe'
+down_revision = 'da872337554b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The retention, read by the prune trigger and by app.services.changes
+    op.execute(
+        "CREATE FUNCTION hero_tombstone_retention() RETURNS interval "
+        "LANGUAGE sql IMMUTABLE AS $$ SELECT interval '30 days' $$"
+    )
+    # The row trigger only records; pruning ran once per deleted row before
+    op.execute(
+        "CREATE OR REPLACE FUNCTION record_hero_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "INSERT INTO hero_tombstones (id) VALUES (OLD.id) ON CONFLICT (id) DO UPDATE SET deleted_at = now(); "
+        "RETURN NULL; "
+        "END $$"
+    )
+    op.execute(
+        "CREATE FUNCTION prune_hero_tombstones() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "DELETE FROM hero_tombstones WHERE deleted_at < now() - hero_tombstone_retention(); "
+        "RETURN NULL; "
+        "END $$"
+    )
+    op.execute(
+        "CREATE TRIGGER heroes_tombstone_prune AFTER DELETE ON heroes "
+        "FOR EACH STATEMENT EXECUTE FUNCTION prune_hero_tombstones()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER heroes_tombstone_prune ON heroes")
+    op.execute("DROP FUNCTION prune_hero_tombstones()")
+    op.execute(
+        "CREATE OR REPLACE FUNCTION record_hero_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "INSERT INTO hero_tombstones (id) VALUES (OLD.id) ON CONFLICT (id) DO UPDATE SET deleted_at = now(); "
+        "DELETE FROM hero_tombstones WHERE deleted_at < now() - interval '30 days'; "
+        "RETURN NULL; "
+        "END $$"
+    )
+    op.execute("DROP FUNCTION hero_tombstone_retention()")
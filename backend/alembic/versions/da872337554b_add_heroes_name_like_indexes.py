@@ -0,0 +1,29 @@
+"""Add trigram indexes for the nickname and lastname filters
+
+Revision ID: da872337554b
+Revises: 39e60a8d899f
+Create Date: 2025-09-17 14:05:12.640391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'da872337554b'
+down_revision = '39e60a8d899f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ILIKE '%...%' of GET /api/heroes?nickname=&lastname=; pg_trgm comes from a25d2078360c
+    op.create_index('ix_heroes_nickname_like', 'heroes', ['nickname'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'nickname': 'gin_trgm_ops'})
+    op.create_index('ix_heroes_lastname_like', 'heroes', ['lastname'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'lastname': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_heroes_lastname_like', table_name='heroes')
+    op.drop_index('ix_heroes_nickname_like', table_name='heroes')
@@ -0,0 +1,56 @@
+"""Add hero tombstones and index updated_at for delta syncs
+
+Revision ID: fb13b4be7053
+Revises: b06c9af8261a
+Create Date: 2025-09-14 10:21:36.804117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'fb13b4be7053'
+down_revision = 'b06c9af8261a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # updated_at becomes the change token of every hero, set from the insert on
+    op.execute("UPDATE heroes SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL")
+    op.alter_column('heroes', 'updated_at', server_default=sa.text('now()'), nullable=False)
+    op.create_index('ix_heroes_updated_at_id', 'heroes', ['updated_at', 'id'], unique=False)
+
+    op.create_table(
+        'hero_tombstones',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_hero_tombstones_deleted_at', 'hero_tombstones', ['deleted_at'], unique=False)
+
+    # Every delete leaves a tombstone, whatever issued it; those past the
+    # retention of app.services.changes are pruned on the way
+    op.execute(
+        "CREATE FUNCTION record_hero_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "INSERT INTO hero_tombstones (id) VALUES (OLD.id) ON CONFLICT (id) DO UPDATE SET deleted_at = now(); "
+        "DELETE FROM hero_tombstones WHERE deleted_at < now() - interval '30 days'; "
+        "RETURN NULL; "
+        "END $$"
+    )
+    op.execute(
+        "CREATE TRIGGER heroes_tombstone AFTER DELETE ON heroes "
+        "FOR EACH ROW EXECUTE FUNCTION record_hero_tombstone()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER heroes_tombstone ON heroes")
+    op.execute("DROP FUNCTION record_hero_tombstone()")
+    op.drop_index('ix_hero_tombstones_deleted_at', table_name='hero_tombstones')
+    op.drop_table('hero_tombstones')
+    op.drop_index('ix_heroes_updated_at_id', table_name='heroes')
+    op.alter_column('heroes', 'updated_at', server_default=None, nullable=True)
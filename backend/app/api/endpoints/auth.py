@@ -1,8 +1,13 @@
 from datetime import timedelta
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_current_user, security
+from app.db.session import get_db
 from app.schemas.auth import LoginRequest, Token
 from app.core.security import create_access_token
 from app.core.config import settings
+from app.services.revocations import revoke
 
 router = APIRouter()
 
@@ -18,4 +23,14 @@ def login(login_request: LoginRequest):
     access_token = create_access_token(
         data={"sub": "admin"}, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/logout")
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # Refused by every worker, including the ones started later, until the token expires
+    await revoke(db, credentials.credentials)
+    return {"message": "Logged out successfully"}
\ No newline at end of file
@@ -1,99 +1,548 @@
-from typing import List
+import asyncio
+from datetime import datetime
+from typing import List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Float, any_, bindparam, case, delete, func, insert, literal, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.patterns import escape_like, substring_pattern
+from app.db.replicas import database_stats, get_read_db
 from app.db.session import get_db
-from app.models.hero import Hero
-from app.schemas.hero import Hero as HeroSchema, HeroCreate, HeroUpdate
+from app.models.hero import Hero, SEARCH_CONFIG
+from app.schemas.hero import (
+    Hero as HeroSchema, HeroBatch, HeroBatchRequest, HeroChanges, HeroCreate, HeroUpdate, HeroBulkRequest, HeroBulkResult,
+    HeroSearchHit, SimilarHeroes,
+)
 from app.api.deps import get_current_user
-import shutil
+from app.api.pagination import encode_cursor, decode_cursor
+from app.api.preconditions import hero_etag, parse_if_match
+from app.core.cache import (
+    CacheEntry, response_cache, cache_key, cached_response, fills, get_or_fill, LIST_CACHE_TAG, hero_cache_tag,
+    invalidate_hero_cache, resource_key, transient_entry,
+)
+import math
 import os
+import re
 from pathlib import Path
 from app.core.config import settings
+from app.core.serialization import encode, join_array, join_object, negotiate_media_type
+from app.services.uploads import store_upload
+from app.services.bulk import write_heroes
+from app.services.changes import ChangeTokenExpired, read_changes
+from app.services.events import hero_events
+from app.services.jobs import job_runner
+from app.services.similar import Metric, nearest_heroes
+from app.services.teams import mark_heroes_changed, skill_matrix
 
 router = APIRouter()
 
-@router.get("/", response_model=List[HeroSchema])
-def get_heroes(db: Session = Depends(get_db)):
-    heroes = db.query(Hero).all()
-    return heroes
+HERO_FIELDS = tuple(HeroSchema.model_fields)
+HERO_COLUMNS = tuple(getattr(Hero, f) for f in HERO_FIELDS)
+# Time of the last write, which the hero ETag is made of
+HERO_VERSION = Hero.updated_at
+# Reconnection delay suggested to EventSource clients
+EVENTS_RETRY_MS = 3000
+# Fields a partial update cannot set to null
+REQUIRED_FIELDS = [name for name, field in HeroCreate.model_fields.items() if field.is_required()]
+# `skill[strength]>=4` reaches us as the key `skill[strength]>` with the value `4`
+SKILL_FILTER = re.compile(r"^skill\[([^\]]+)\]([<>]?)$")
 
-@router.get("/{hero_id}", response_model=HeroSchema)
-def get_hero(hero_id: UUID, db: Session = Depends(get_db)):
-    hero = db.query(Hero).filter(Hero.id == hero_id).first()
+def last_modified(*timestamps: Optional[datetime]) -> Optional[datetime]:
+    return max((ts for ts in timestamps if ts is not None), default=None)
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(HERO_FIELDS)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in HERO_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id is always returned so that clients can address the hero
+    return ["id"] + [f for f in selected if f != "id"]
+
+def parse_skill_filters(request: Request) -> list:
+    """Conditions for the `skill[name]=5`, `skill[name]>=4` and `skill[name]<=2` query parameters."""
+    conditions = []
+    for key, value in request.query_params.multi_items():
+        match = SKILL_FILTER.match(key)
+        if not match:
+            continue
+        name, operator = match.groups()
+        try:
+            level = float(value)
+        except ValueError:
+            level = math.nan
+        if not math.isfinite(level):
+            raise HTTPException(status_code=400, detail=f"Invalid skill level for {name}: {value}")
+        if not operator:
+            # Containment is answered by the GIN index on skills
+            conditions.append(Hero.skills.contains({name: int(level) if level.is_integer() else level}))
+            continue
+        # The CASE keeps non-numeric levels away from the cast
+        stored = case((func.jsonb_typeof(Hero.skills[name]) == "number", Hero.skills[name].astext.cast(Float)))
+        conditions.append(Hero.skills.has_key(name))
+        conditions.append(stored >= level if operator == ">" else stored <= level)
+    return conditions
+
+async def get_hero_or_404(db: AsyncSession, hero_id: UUID) -> Hero:
+    hero = await db.get(Hero, hero_id)
     if not hero:
         raise HTTPException(status_code=404, detail="Hero not found")
     return hero
 
+def nickname_conflict(error: IntegrityError) -> bool:
+    # Violation of the unique index on nickname, as worded by asyncpg, psycopg2 or SQLite
+    return "nickname" in str(error.orig)
+
+def version_conditions(request: Request) -> list:
+    """WHERE clause of a write made under `If-Match: <ETag of the hero>`."""
+    versions = parse_if_match(request.headers.get("if-match"))
+    return [] if versions is None else [HERO_VERSION.in_(versions)]
+
+async def write_failure(db: AsyncSession, hero_id: UUID, conditions: list) -> HTTPException:
+    """404 when no row matched the write, or 412 when the hero exists with another version."""
+    if conditions and await db.scalar(select(Hero.id).where(Hero.id == hero_id)) is not None:
+        return HTTPException(status_code=412, detail="Hero was modified since it was read")
+    return HTTPException(status_code=404, detail="Hero not found")
+
+def parse_ids(values: List[str]) -> List[UUID]:
+    ids = []
+    for value in values:
+        for item in filter(None, (item.strip() for item in value.split(","))):
+            try:
+                ids.append(UUID(item))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid hero id: {item}")
+    return ids
+
+def hero_id_in(ids: List[UUID]):
+    # `id = ANY(:hero_ids)`: a single array parameter, so every batch size shares one prepared statement
+    return Hero.id == any_(bindparam("hero_ids", ids, type_=ARRAY(Hero.id.type)))
+
+async def batch_response(request: Request, ids: List[UUID], db: AsyncSession) -> Response:
+    """Heroes in the requested order, each reusing or filling the cache entry of GET /{hero_id}."""
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.heroes_batch_max_ids:
+        raise HTTPException(status_code=400, detail=f"Too many ids (max {settings.heroes_batch_max_ids})")
+    media_type = negotiate_media_type(request)
+    base_path = request.url.path.rsplit("/", 1)[0]
+    keys = {hero_id: resource_key(f"{base_path}/{hero_id}", media_type) for hero_id in ids}
+
+    bodies = {}
+    for hero_id, key in keys.items():
+        entry = response_cache.get(key)
+        if entry:
+            bodies[hero_id] = entry.body
+    pending = [hero_id for hero_id in ids if hero_id not in bodies]
+    if pending:
+        version = response_cache.version
+        result = await db.execute(select(*HERO_COLUMNS).where(hero_id_in(pending)))
+        for row in result:
+            entry = response_cache.set(
+                keys[row.id],
+                encode(dict(zip(HERO_FIELDS, row)), media_type),
+                tags=[hero_cache_tag(row.id)],
+                version=version,
+                last_modified=row.updated_at,
+                media_type=media_type,
+                etag=hero_etag(row.updated_at, media_type),
+            )
+            bodies[row.id] = entry.body
+
+    body = join_object({
+        "heroes": join_array([bodies[hero_id] for hero_id in ids if hero_id in bodies], media_type),
+        "missing": encode([hero_id for hero_id in ids if hero_id not in bodies], media_type),
+    }, media_type)
+    return cached_response(request, transient_entry(body, media_type))
+
+def hero_response(request: Request, row) -> Response:
+    media_type = negotiate_media_type(request)
+    return Response(
+        content=encode(dict(zip(HERO_FIELDS, row)), media_type),
+        media_type=media_type,
+        headers={"ETag": hero_etag(row.updated_at, media_type)},
+    )
+
+@router.get("/", response_model=List[HeroSchema])
+async def get_heroes(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    nickname: Optional[str] = None,
+    lastname: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    min_avg_skill: Optional[float] = Query(None, ge=0),
+    order_by: Literal["created_at", "avg_skill", "max_skill"] = "created_at",
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """List heroes ordered by (created_at, id), one page at a time.
+
+    `order_by=avg_skill` or `max_skill` lists the strongest heroes first. Skill
+    levels are filtered with `skill[name]=5`, `skill[name]>=4` or `skill[name]<=2`.
+    The cursor of the next page is returned in the `X-Next-Cursor` and `Link` headers.
+    """
+    media_type = negotiate_media_type(request)
+    key = cache_key(request, media_type)
+
+    async def fill(version: int) -> CacheEntry:
+        page_size = min(limit or settings.heroes_page_size, settings.heroes_max_page_size)
+        selected = parse_fields(fields)
+
+        # The sort key and id build the next cursor, created_at/updated_at the Last-Modified header
+        columns = [getattr(Hero, f) for f in dict.fromkeys(selected + [order_by, "created_at", "updated_at"])]
+        query = select(*columns).where(*parse_skill_filters(request))
+        if nickname:
+            # Served by the trigram indexes of migration da872337554b
+            query = query.where(Hero.nickname.ilike(substring_pattern(nickname), escape="\\"))
+        if lastname:
+            query = query.where(Hero.lastname.ilike(substring_pattern(lastname), escape="\\"))
+        if created_after:
+            query = query.where(Hero.created_at >= created_after)
+        if created_before:
+            query = query.where(Hero.created_at < created_before)
+        if updated_after:
+            query = query.where(Hero.updated_at >= updated_after)
+        if updated_before:
+            query = query.where(Hero.updated_at < updated_before)
+        if min_avg_skill is not None:
+            query = query.where(Hero.avg_skill >= min_avg_skill)
+
+        sort_key = getattr(Hero, order_by)
+        if order_by == "created_at":
+            order = [sort_key, Hero.id]
+        else:
+            order = [sort_key.desc(), Hero.id.desc()]
+        if cursor:
+            after, after_id = decode_cursor(cursor, datetime if order_by == "created_at" else float)
+            position = tuple_(sort_key, Hero.id)
+            after_position = tuple_(literal(after, sort_key.type), literal(after_id, Hero.id.type))
+            query = query.where(position > after_position if order_by == "created_at" else position < after_position)
+
+        result = await db.execute(query.order_by(*order).limit(page_size + 1))
+        rows = result.all()
+
+        headers = {}
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1]._mapping[order_by], rows[-1].id)
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+        # The selected fields are the leading columns of each row
+        heroes = [dict(zip(selected, row)) for row in rows]
+        return response_cache.set(
+            key,
+            encode(heroes, media_type),
+            tags=[LIST_CACHE_TAG],
+            version=version,
+            last_modified=last_modified(*(row.updated_at for row in rows)),
+            headers=headers,
+            media_type=media_type,
+        )
+
+    return cached_response(request, await get_or_fill(key, fill))
+
+@router.get("/search", response_model=List[HeroSearchHit])
+async def search_heroes(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: Literal["fulltext", "autocomplete"] = "fulltext",
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Ranked hero search, served from the GIN indexes of the a25d2078360c migration.
+
+    `fulltext` matches nickname, names and description with French stemming,
+    ignoring accents. `autocomplete` matches nicknames by prefix or trigram similarity.
+    """
+    media_type = negotiate_media_type(request)
+    key = cache_key(request, media_type)
+
+    async def fill(version: int) -> CacheEntry:
+        selected = parse_fields(fields)
+        columns = [getattr(Hero, f) for f in selected]
+        if mode == "fulltext":
+            ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q)
+            score = func.ts_rank_cd(Hero.search_vector, ts_query).label("score")
+            query = select(*columns, score).where(Hero.search_vector.op("@@")(ts_query))
+            order = [score.desc()]
+        else:
+            nickname = func.f_unaccent(func.lower(Hero.nickname))
+            term = func.f_unaccent(func.lower(q))
+            score = func.similarity(nickname, term).label("score")
+            # Escaped before unaccent and lower, which leave %, _ and \ alone
+            prefix_match = nickname.like(func.f_unaccent(func.lower(escape_like(q))).concat("%"), escape="\\")
+            query = select(*columns, score).where(or_(prefix_match, nickname.op("%")(term)))
+            order = [prefix_match.desc(), score.desc()]
+
+        result = await db.execute(query.order_by(*order, Hero.id).limit(limit))
+        hits = [dict(zip(selected + ["score"], row)) for row in result]
+        return response_cache.set(key, encode(hits, media_type), tags=[LIST_CACHE_TAG], version=version, media_type=media_type)
+
+    return cached_response(request, await get_or_fill(key, fill))
+
+@router.get("/cache/stats")
+def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    return {**response_cache.stats(), "fills": fills.stats()}
+
+@router.get("/db/stats")
+def get_db_stats(current_user: dict = Depends(get_current_user)):
+    return database_stats()
+
+@router.get("/changes", response_model=HeroChanges)
+async def get_hero_changes(
+    request: Request,
+    since: Optional[str] = Query(None, description="Change token returned by the previous call"),
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db),
+):
+    """Heroes created or updated since a change token, and the ids of the deleted ones.
+
+    Without `since`, every hero is returned. Follow `next` while `has_more` is
+    true, then keep it for the next sync. A token older than the tombstone
+    retention gets 410: reload everything. Served by the primary, since a
+    replica's clock runs ahead of the data it has replayed.
+    """
+    limit = min(limit or settings.changes_page_size, settings.changes_page_size)
+    position = decode_cursor(since) if since else None
+    try:
+        changes = await read_changes(db, HERO_COLUMNS, position, limit)
+    except ChangeTokenExpired:
+        raise HTTPException(status_code=410, detail="Change token expired, reload all heroes")
+
+    media_type = negotiate_media_type(request)
+    body = {
+        "heroes": [dict(zip(HERO_FIELDS, row)) for row in changes.rows],
+        "deleted": changes.deleted,
+        "next": encode_cursor(*changes.position),
+        "has_more": changes.has_more,
+    }
+    return Response(content=encode(body, media_type), media_type=media_type)
+
+@router.get("/events")
+async def stream_hero_events(request: Request, last_event_id: Optional[str] = Query(None)):
+    """Server-Sent Events for hero changes: `created`, `updated`, `deleted` and `image`.
+
+    Each event carries the ids of the heroes concerned. A client reconnecting
+    with `Last-Event-ID` (EventSource sends it by itself) first gets the events
+    it missed, or a `reset` event when they left the replay buffer.
+    """
+    resume_from = request.headers.get("last-event-id") or last_event_id
+
+    async def stream():
+        subscription, backlog = hero_events.subscribe(resume_from)
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n".encode()
+            if backlog is None:
+                yield b'event: reset\ndata: {"ids":[]}\n\n'
+            for frame in backlog or []:
+                yield frame
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), settings.events_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            hero_events.unsubscribe(subscription)
+
+    # X-Accel-Buffering keeps nginx from holding events back
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+@router.get("/batch", response_model=HeroBatch)
+async def get_heroes_batch(
+    request: Request,
+    ids: List[str] = Query([], description="Hero ids, comma-separated or repeated"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Several heroes by id in one query, in the order asked; unknown ids are listed in `missing`."""
+    return await batch_response(request, parse_ids(ids), db)
+
+@router.post("/batch", response_model=HeroBatch)
+async def post_heroes_batch(payload: HeroBatchRequest, request: Request, db: AsyncSession = Depends(get_read_db)):
+    """GET /batch for id lists too long for a URL."""
+    return await batch_response(request, payload.ids, db)
+
+@router.get("/{hero_id}", response_model=HeroSchema)
+async def get_hero(hero_id: UUID, request: Request, db: AsyncSession = Depends(get_read_db)):
+    media_type = negotiate_media_type(request)
+    key = cache_key(request, media_type)
+
+    async def fill(version: int) -> CacheEntry:
+        result = await db.execute(select(*HERO_COLUMNS).where(Hero.id == hero_id))
+        row = result.first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Hero not found")
+        return response_cache.set(
+            key,
+            encode(dict(zip(HERO_FIELDS, row)), media_type),
+            tags=[hero_cache_tag(hero_id)],
+            version=version,
+            last_modified=row.updated_at,
+            media_type=media_type,
+            etag=hero_etag(row.updated_at, media_type),
+        )
+
+    return cached_response(request, await get_or_fill(key, fill))
+
+@router.get("/{hero_id}/similar", response_model=SimilarHeroes)
+async def get_similar_heroes(
+    hero_id: UUID,
+    k: int = Query(10, ge=1, le=settings.heroes_similar_max_k),
+    metric: Metric = "cosine",
+    db: AsyncSession = Depends(get_db),
+):
+    """Heroes whose skills are closest to this hero's, from the in-memory skill matrix."""
+    snapshot = await skill_matrix.snapshot(db, settings.team_matrix_max_age_seconds)
+    try:
+        row = snapshot.ids.index(hero_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Hero not found")
+    return {
+        "metric": metric,
+        "heroes": [
+            {"id": snapshot.ids[position], "nickname": snapshot.nicknames[position], "score": score}
+            for position, score in nearest_heroes(snapshot, row, k, metric)
+        ],
+    }
+
 @router.post("/", response_model=HeroSchema)
-def create_hero(hero: HeroCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    # Check if nickname already exists
-    existing_hero = db.query(Hero).filter(Hero.nickname == hero.nickname).first()
-    if existing_hero:
+async def create_hero(hero: HeroCreate, request: Request, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    # A single INSERT ... RETURNING; the unique index on nickname reports duplicates
+    try:
+        result = await db.execute(insert(Hero).values(**hero.dict()).returning(*HERO_COLUMNS))
+        row = result.one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if not nickname_conflict(e):
+            raise
         raise HTTPException(status_code=400, detail="Nickname already exists")
-    
-    db_hero = Hero(**hero.dict())
-    db.add(db_hero)
-    db.commit()
-    db.refresh(db_hero)
-    return db_hero
+    invalidate_hero_cache()
+    mark_heroes_changed(row.id)
+    await hero_events.publish("created", row.id)
+    return hero_response(request, row)
+
+@router.post("/bulk", response_model=HeroBulkResult)
+async def bulk_create_heroes(payload: HeroBulkRequest, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """Create (or upsert on nickname) many heroes in a single transaction."""
+    if len(payload.heroes) > settings.bulk_max_items:
+        raise HTTPException(status_code=413, detail=f"Too many heroes (max {settings.bulk_max_items})")
+
+    try:
+        outcome = await write_heroes(db, payload.heroes, payload.mode, settings.bulk_batch_size)
+        await db.commit()
+    except IntegrityError:
+        # A nickname was taken by a concurrent write after the lookup
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Nickname conflict during bulk write, nothing was saved")
+
+    if outcome.created or outcome.updated:
+        invalidate_hero_cache(*outcome.updated_ids)
+        mark_heroes_changed(*outcome.written_ids)
+        await hero_events.publish("created", *outcome.created_ids)
+        await hero_events.publish("updated", *outcome.updated_ids)
+    return HeroBulkResult(
+        created=outcome.created,
+        updated=outcome.updated,
+        failed=outcome.failed,
+        items=outcome.items,
+    )
 
 @router.put("/{hero_id}", response_model=HeroSchema)
-def update_hero(hero_id: UUID, hero: HeroUpdate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    db_hero = db.query(Hero).filter(Hero.id == hero_id).first()
-    if not db_hero:
-        raise HTTPException(status_code=404, detail="Hero not found")
-    
-    # Check nickname uniqueness if being updated
-    if hero.nickname and hero.nickname != db_hero.nickname:
-        existing_hero = db.query(Hero).filter(Hero.nickname == hero.nickname).first()
-        if existing_hero:
-            raise HTTPException(status_code=400, detail="Nickname already exists")
-    
+@router.patch("/{hero_id}", response_model=HeroSchema)
+async def update_hero(hero_id: UUID, hero: HeroUpdate, request: Request, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """Set the fields present in the body with a single UPDATE ... RETURNING.
+
+    With `If-Match: <ETag>` the update only applies to the version the client
+    read; a hero written since then is left alone and 412 is returned.
+    """
     hero_data = hero.dict(exclude_unset=True)
-    for field, value in hero_data.items():
-        setattr(db_hero, field, value)
-    
-    db.commit()
-    db.refresh(db_hero)
-    return db_hero
+    nulls = [field for field in REQUIRED_FIELDS if field in hero_data and hero_data[field] is None]
+    if nulls:
+        raise HTTPException(status_code=400, detail=f"Fields cannot be null: {', '.join(nulls)}")
+
+    conditions = version_conditions(request)
+    if not hero_data:
+        # Nothing to write: the hero as it is, with no invalidation nor event
+        result = await db.execute(select(*HERO_COLUMNS).where(Hero.id == hero_id, *conditions))
+        row = result.first()
+        if row is None:
+            raise await write_failure(db, hero_id, conditions)
+        return hero_response(request, row)
+
+    if "profile_picture" in hero_data:
+        # The derivatives belong to the previous picture; the job of an upload makes new ones
+        hero_data["profile_picture_variants"] = case(
+            (Hero.profile_picture.is_distinct_from(hero_data["profile_picture"]), None),
+            else_=Hero.profile_picture_variants,
+        )
+    statement = (
+        update(Hero).where(Hero.id == hero_id, *conditions).values(**hero_data)
+        .returning(*HERO_COLUMNS).execution_options(synchronize_session=False)
+    )
+    try:
+        result = await db.execute(statement)
+        row = result.first()
+        if row is None:
+            raise await write_failure(db, hero_id, conditions)
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if not nickname_conflict(e):
+            raise
+        raise HTTPException(status_code=400, detail="Nickname already exists")
+    invalidate_hero_cache(hero_id)
+    mark_heroes_changed(hero_id)
+    await hero_events.publish("updated", hero_id)
+    return hero_response(request, row)
 
 @router.delete("/{hero_id}")
-def delete_hero(hero_id: UUID, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    hero = db.query(Hero).filter(Hero.id == hero_id).first()
-    if not hero:
-        raise HTTPException(status_code=404, detail="Hero not found")
-    
-    db.delete(hero)
-    db.commit()
+async def delete_hero(hero_id: UUID, request: Request, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    conditions = version_conditions(request)
+    result = await db.execute(
+        delete(Hero).where(Hero.id == hero_id, *conditions)
+        .returning(Hero.id).execution_options(synchronize_session=False)
+    )
+    if result.first() is None:
+        raise await write_failure(db, hero_id, conditions)
+    await db.commit()
+    invalidate_hero_cache(hero_id)
+    mark_heroes_changed(hero_id)
+    await hero_events.publish("deleted", hero_id)
     return {"message": "Hero deleted successfully"}
 
 @router.post("/upload-image/{hero_id}")
-async def upload_hero_image(hero_id: UUID, file: UploadFile = File(...), db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    hero = db.query(Hero).filter(Hero.id == hero_id).first()
-    if not hero:
-        raise HTTPException(status_code=404, detail="Hero not found")
-    
-    # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Invalid file type. Only images are allowed.")
-    
-    # Create uploads directory if it doesn't exist
-    upload_dir = Path(settings.upload_dir)
-    upload_dir.mkdir(exist_ok=True)
+async def upload_hero_image(hero_id: UUID, file: UploadFile = File(...), db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    hero = await get_hero_or_404(db, hero_id)
     
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    filename = f"{hero_id}.{file_extension}"
-    file_path = upload_dir / filename
+    # Stream to disk under the content hash; the type is sniffed from the bytes, not the client headers
+    stored = await store_upload(file, Path(settings.upload_dir), settings.max_upload_bytes)
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Update hero with image path; the previous derivatives no longer match it
+    hero.profile_picture = f"/uploads/{stored.filename}"
+    hero.profile_picture_variants = None
+    await db.commit()
+    invalidate_hero_cache(hero_id)
+    await hero_events.publish("image", hero_id)
     
-    # Update hero with image path
-    hero.profile_picture = f"/uploads/{filename}"
-    db.commit()
+    # Resized variants are generated by a background job; GET /api/jobs/{job_id} follows it
+    job_id = await job_runner.enqueue("hero_image", {
+        "hero_id": str(hero_id),
+        "profile_picture": hero.profile_picture,
+        "source": str(stored.path),
+    })
     
-    return {"message": "Image uploaded successfully", "filename": filename}
\ No newline at end of file
+    return {"message": "Image uploaded successfully", "filename": stored.filename, "job_id": job_id}
\ No newline at end of file
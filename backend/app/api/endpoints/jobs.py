@@ -0,0 +1,17 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_current_user
+from app.db.session import get_db
+from app.models.job import Job as JobModel
+from app.schemas.job import Job
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: UUID, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """Status, progress and outcome of a background job; poll it until it is finished."""
+    job = await db.get(JobModel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
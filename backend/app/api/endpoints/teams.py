@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.session import get_db
+from app.schemas.team import Team, TeamMember, TeamOptimizeRequest, TeamOptimizeResult
+from app.services.teams import coverage_columns, hero_scores, search_teams, skill_matrix
+
+router = APIRouter()
+
+@router.post("/optimize", response_model=TeamOptimizeResult)
+async def optimize_team(constraints: TeamOptimizeRequest, db: AsyncSession = Depends(get_db)):
+    """Best teams under the given constraints, scored from the in-memory skill matrix.
+
+    The score of a team is the sum of its members' scores: their average skill
+    level, or the weighted sum of their levels when `weights` is given.
+    """
+    if len(constraints.required) > constraints.size:
+        raise HTTPException(status_code=400, detail="More required heroes than team slots")
+    if set(constraints.required) & set(constraints.excluded):
+        raise HTTPException(status_code=400, detail="A hero cannot be both required and excluded")
+
+    snapshot = await skill_matrix.snapshot(db, settings.team_matrix_max_age_seconds)
+    rows = {hero_id: row for row, hero_id in enumerate(snapshot.ids)}
+    unknown = [str(hero_id) for hero_id in constraints.required if hero_id not in rows]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Heroes not found: {', '.join(unknown)}")
+
+    scores = hero_scores(snapshot, constraints.weights)
+    coverage, needed = coverage_columns(snapshot, constraints.min_coverage)
+    outcome = await run_in_threadpool(
+        search_teams,
+        scores,
+        coverage,
+        needed,
+        list(dict.fromkeys(rows[hero_id] for hero_id in constraints.required)),
+        [rows[hero_id] for hero_id in constraints.excluded if hero_id in rows],
+        constraints.size,
+        constraints.top_k,
+        settings.team_search_max_nodes,
+    )
+
+    teams = [
+        Team(
+            score=score,
+            members=[
+                TeamMember(id=snapshot.ids[row], nickname=snapshot.nicknames[row], score=float(scores[row]))
+                for row in members
+            ],
+            coverage={
+                name: float(coverage[list(members), column].max())
+                for column, name in enumerate(constraints.min_coverage)
+            },
+        )
+        for score, members in outcome.teams
+    ]
+    return TeamOptimizeResult(
+        teams=teams,
+        candidates=outcome.candidates,
+        explored=outcome.explored,
+        exhaustive=outcome.exhaustive,
+    )
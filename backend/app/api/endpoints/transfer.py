@@ -0,0 +1,122 @@
+from typing import List, Literal, Optional
+from uuid import uuid4
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_current_user
+from app.api.pagination import decode_cursor, encode_cursor
+from app.core.cache import invalidate_hero_cache
+from app.core.config import settings
+from app.db.session import db_session, get_db
+from app.schemas.hero import HeroCreate, HeroImportError, HeroImportProgress
+from app.services.bulk import write_heroes
+from app.services.changes import NIL_ID, change_horizon
+from app.services.events import hero_events
+from app.services.teams import mark_heroes_changed
+from app.services.transfer import export_filters, export_ndjson, iter_ndjson_lines, start_import, get_import
+
+router = APIRouter()
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MAX_REPORTED_ERRORS = 20
+
+@router.get("/export")
+async def export_heroes(
+    gzip: bool = False,
+    exclude_keyword: List[str] = Query([], description="Skip heroes whose nickname contains one of these words"),
+    min_description_length: int = Query(0, ge=0),
+    since: Optional[str] = Query(None, description="X-Change-Token of a previous export"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Stream every hero as one JSON object per line, in constant memory.
+
+    `X-Change-Token` can be passed back as `since` to export only the heroes
+    written in between (deletions are listed by GET /changes).
+    """
+    filters = export_filters(exclude_keyword, min_description_length, decode_cursor(since) if since else None)
+    async with db_session() as db:
+        horizon = await change_horizon(db)
+    headers = {
+        "Content-Disposition": 'attachment; filename="heroes.ndjson"',
+        "X-Change-Token": encode_cursor(horizon, NIL_ID),
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_ndjson(filters, gzip, settings.transfer_batch_size),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+@router.post("/import", response_model=HeroImportProgress)
+async def import_heroes(
+    request: Request,
+    mode: Literal["create", "upsert"] = "upsert",
+    skip: int = Query(0, ge=0, description="Lines already committed by a previous attempt"),
+    import_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Consume an NDJSON stream (optionally gzip-encoded) and commit it batch by batch.
+
+    Progress can be followed with GET /import/{import_id}. If the import stops,
+    sending the same stream again with ?skip=<lines_committed> resumes it.
+    """
+    progress = start_import(import_id or uuid4().hex)
+    progress.lines_read = progress.lines_committed = skip
+    gzip = request.headers.get("content-encoding", "").lower() == "gzip"
+    batch: List[HeroCreate] = []
+
+    async def flush(last_line: int):
+        outcome = await write_heroes(db, batch, mode, settings.transfer_batch_size)
+        await db.commit()
+        invalidate_hero_cache(*outcome.updated_ids)
+        mark_heroes_changed(*outcome.written_ids)
+        await hero_events.publish("created", *outcome.created_ids)
+        await hero_events.publish("updated", *outcome.updated_ids)
+        progress.created += outcome.created
+        progress.updated += outcome.updated
+        progress.failed += outcome.failed
+        progress.lines_committed = last_line
+        batch.clear()
+
+    line_number = 0
+    try:
+        async for line in iter_ndjson_lines(request.stream(), gzip):
+            line_number += 1
+            if line_number <= skip:
+                continue
+            progress.lines_read = line_number
+            try:
+                batch.append(HeroCreate.model_validate_json(line))
+            except ValidationError as e:
+                progress.failed += 1
+                if len(progress.errors) < MAX_REPORTED_ERRORS:
+                    progress.errors.append(HeroImportError(line=line_number, error=str(e.errors()[0]["msg"])))
+                continue
+            if len(batch) >= settings.transfer_batch_size:
+                await flush(line_number)
+        if batch:
+            await flush(line_number)
+        progress.lines_committed = line_number
+    except IntegrityError:
+        await db.rollback()
+        progress.status = "failed"
+        progress.detail = "Nickname conflict with a concurrent write; resume with skip=lines_committed"
+        return JSONResponse(status_code=409, content=progress.model_dump())
+    except Exception:
+        progress.status = "failed"
+        progress.detail = "Import interrupted; resume with skip=lines_committed"
+        raise
+
+    progress.status = "completed"
+    return progress
+
+@router.get("/import/{import_id}", response_model=HeroImportProgress)
+def get_import_progress(import_id: str, current_user: dict = Depends(get_current_user)):
+    progress = get_import(import_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return progress
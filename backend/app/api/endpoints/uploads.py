@@ -0,0 +1,153 @@
+import mimetypes
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple
+import aiofiles
+import aiofiles.os
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.services.uploads import CHUNK_SIZE, is_content_hashed, upload_path
+
+router = APIRouter()
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Files named otherwise may be replaced in place: revalidate them every time
+REVALIDATE = "public, no-cache"
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def file_etag(path: Path, result) -> str:
+    # A content-hashed name is already a strong validator; files are replaced
+    # by an atomic rename, so mtime and size tell two versions of the others apart
+    if is_content_hashed(path):
+        return f'"{path.stem}"'
+    return f'"{result.st_mtime_ns:x}-{result.st_size:x}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First and last byte of a single `bytes=` range, or None to send the whole file.
+
+    Malformed and multi-range headers are ignored, as RFC 9110 allows; a
+    well-formed range that starts past the end raises RangeNotSatisfiable.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, sep, last = ranges.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def range_applies(request: Request, etag: str, last_modified: str) -> bool:
+    # If-Range: the client holds part of this exact version, otherwise it gets it all
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    return if_range == etag if if_range.startswith('"') else if_range == last_modified
+
+
+async def read_file(path: Path, start: int, length: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offload_headers(path: Path) -> dict:
+    """Let the reverse proxy send the file itself (deploy/nginx/cyprine-frontend.conf).
+
+    The proxy then handles ranges and validators on its own.
+    """
+    if settings.uploads_offload == "x-accel-redirect":
+        relative = path.relative_to(Path(settings.upload_dir).resolve()).as_posix()
+        return {"X-Accel-Redirect": f"{settings.uploads_accel_prefix.rstrip('/')}/{relative}"}
+    return {"X-Sendfile": str(path)}
+
+
+@router.api_route("/{name:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_upload(name: str, request: Request):
+    """Uploaded images and their variants, with byte ranges and conditional requests.
+
+    The upload directory is only looked up here, so it may be created after
+    startup by the first upload.
+    """
+    path = upload_path(Path(settings.upload_dir), name)
+    try:
+        result = await aiofiles.os.stat(path) if path is not None else None
+    except (FileNotFoundError, NotADirectoryError):
+        result = None
+    if result is None or not stat.S_ISREG(result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    cache_control = IMMUTABLE if is_content_hashed(path) else REVALIDATE
+    if settings.uploads_offload:
+        return Response(headers={"Cache-Control": cache_control, **offload_headers(path)}, media_type=media_type)
+
+    etag = file_etag(path, result)
+    last_modified = formatdate(result.st_mtime, usegmt=True)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+        "ETag": etag,
+        "Last-Modified": last_modified,
+    }
+    if not_modified(request, etag, result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    size = result.st_size
+    start, end, status_code = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    if range_header and range_applies(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+    body = read_file(path, start, length) if request.method == "GET" and length else iter(())
+    return StreamingResponse(body, status_code=status_code, headers=headers, media_type=media_type)
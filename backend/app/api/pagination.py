@@ -0,0 +1,30 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple, Union
+from uuid import UUID
+from fastapi import HTTPException
+
+
+def encode_cursor(position: Union[datetime, float], hero_id: UUID) -> str:
+    """Encode the (sort key, id) keyset position of the last row of a page."""
+    if isinstance(position, datetime):
+        position = position.isoformat()
+    raw = json.dumps([position, str(hero_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: type = datetime) -> Tuple[Union[datetime, float], UUID]:
+    """Decode a cursor whose sort key is a `kind` (datetime or float)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position, hero_id = json.loads(base64.urlsafe_b64decode(padded))
+        if kind is datetime:
+            position = datetime.fromisoformat(position)
+        elif isinstance(position, (int, float)) and not isinstance(position, bool):
+            position = float(position)
+        else:
+            raise ValueError(position)
+        return position, UUID(hero_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
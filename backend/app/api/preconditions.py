@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from app.core.compression import without_encoding
+from app.core.serialization import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def hero_etag(version: datetime, media_type: str = JSON_MEDIA_TYPE) -> str:
+    """Strong ETag of a hero: the time of its last write in microseconds.
+
+    The MessagePack representation gets its own tag, as a compressed one does
+    (see app.core.compression.with_encoding).
+    """
+    if version.tzinfo is None:
+        version = version.replace(tzinfo=timezone.utc)
+    tag = str((version - EPOCH) // MICROSECOND)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        tag += "-msgpack"
+    return f'"{tag}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[List[datetime]]:
+    """Write times named by an If-Match header, or None when there is no condition on them.
+
+    `*` only asks for the hero to exist, which every write checks anyway.
+    Weak or foreign tags can never match: they are dropped, and an empty list
+    makes the write fail with 412.
+    """
+    if header is None:
+        return None
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return None
+        if tag.startswith("W/"):
+            continue
+        tag = without_encoding(tag).strip('"')
+        if tag.endswith("-msgpack"):
+            tag = tag[: -len("-msgpack")]
+        if tag.isdigit():
+            versions.append(EPOCH + int(tag) * MICROSECOND)
+    return versions
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, Optional
+from uuid import UUID
+from fastapi import HTTPException, Request, Response
+from app.core.compression import choose_encoding, compress, with_encoding, without_encoding
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+LIST_CACHE_TAG = "heroes:list"
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    tags: FrozenSet[str]
+    expires_at: float
+    media_type: str = "application/json"
+    # Compressed copies of body by content-coding, made on first request
+    variants: Dict[str, bytes] = field(default_factory=dict)
+    # False once evicted (or never admitted): its variants are then not kept
+    stored: bool = False
+    size: int = field(init=False)
+
+    def __post_init__(self):
+        self.size = len(self.body)
+
+
+class ResponseCache:
+    """In-process LRU/TTL cache of serialized response bodies.
+
+    Entries are tagged (e.g. "heroes:list", "hero:<id>") so that writes can drop
+    exactly the entries they affect. The cache is per process: other workers
+    only see a change once their own entry expires.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def version(self) -> int:
+        """Bumped on every invalidation; a fill started before it is discarded."""
+        return self._version
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(
+        self,
+        key: str,
+        body: bytes,
+        tags: Iterable[str],
+        version: int,
+        last_modified: Optional[datetime] = None,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: str = "application/json",
+        etag: Optional[str] = None,
+    ) -> CacheEntry:
+        entry = CacheEntry(
+            body=body,
+            etag=etag or make_etag(body),
+            last_modified=http_date(last_modified) if last_modified else None,
+            headers=headers or {},
+            tags=frozenset(tags),
+            expires_at=time.monotonic() + self.ttl,
+            media_type=media_type,
+        )
+        with self._lock:
+            if version != self._version or entry.size > self.max_bytes:
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            entry.stored = True
+            self._bytes += entry.size
+            self._evict()
+        return entry
+
+    def variant(self, entry: CacheEntry, encoding: str) -> bytes:
+        """The body of `entry` compressed with `encoding`, compressed once per entry."""
+        body = entry.variants.get(encoding)
+        if body is not None:
+            return body
+        # Entries outside the cache are compressed for this response only, at a faster level
+        body = compress(entry.body, encoding, best=entry.stored)
+        with self._lock:
+            if entry.stored and encoding not in entry.variants:
+                entry.variants[encoding] = body
+                entry.size += len(body)
+                self._bytes += len(body)
+                self._evict()
+        return body
+
+    def invalidate(self, *tags: str) -> int:
+        with self._lock:
+            self._version += 1
+            stale = [key for key, entry in self._entries.items() if entry.tags.intersection(tags)]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            for entry in self._entries.values():
+                entry.stored = False
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        entry.stored = False
+        self._bytes -= entry.size
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def resource_key(path: str, media_type: str = "application/json") -> str:
+    """cache_key of a request for `path` without query parameters."""
+    return path + "?#" + media_type
+
+
+def cache_key(request: Request, media_type: str = "application/json") -> str:
+    """Route path plus query parameters in a canonical order, and the negotiated media type."""
+    query = sorted(request.query_params.multi_items())
+    return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in query) + "#" + media_type
+
+
+def transient_entry(body: bytes, media_type: str = "application/json") -> CacheEntry:
+    """An entry that is never stored, to send a body composed per request through cached_response."""
+    return CacheEntry(
+        body=body,
+        etag=make_etag(body),
+        last_modified=None,
+        headers={},
+        tags=frozenset(),
+        expires_at=0.0,
+        media_type=media_type,
+    )
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Any content-coding of the representation validates it (weak comparison)
+    candidates = [without_encoding(tag) for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_response(request: Request, entry: CacheEntry) -> Response:
+    """Build a 200 response from a cache entry, or a 304 if the client copy is current.
+
+    Bodies above `compression_min_bytes` are sent in the best encoding the
+    client accepts, from a copy compressed once and kept with the entry.
+    """
+    encoding = None
+    if settings.compression_enabled and len(entry.body) >= settings.compression_min_bytes:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": with_encoding(entry.etag, encoding) if encoding else entry.etag,
+        "Vary": "Accept, Accept-Encoding",
+        **entry.headers,
+    }
+    if entry.last_modified:
+        headers["Last-Modified"] = entry.last_modified
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=response_cache.variant(entry, encoding), media_type=entry.media_type, headers=headers)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    max_bytes=settings.response_cache_max_bytes,
+    ttl=settings.response_cache_ttl_seconds,
+)
+
+
+# Cache misses being filled, by cache key and version
+fills = SingleFlight(timeout=settings.coalesce_timeout_seconds)
+
+
+async def get_or_fill(key: str, fill: Callable[[int], Awaitable[CacheEntry]]) -> CacheEntry:
+    """The cached entry for `key`, or the one built by `fill(version)` on a miss.
+
+    Concurrent misses on the same key share one fill, its query and its
+    serialized body, instead of all reaching the database at once. Only fills
+    started since the last invalidation are joined, so a client never gets
+    data older than its own write.
+    """
+    entry = response_cache.get(key)
+    if entry is not None:
+        return entry
+    version = response_cache.version
+    if not settings.coalesce_enabled:
+        return await fill(version)
+    try:
+        return await fills.do(f"{key}@{version}", lambda: fill(version))
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Timed out waiting for an identical request",
+            headers={"Retry-After": "1"},
+        )
+
+
+def hero_cache_tag(hero_id: UUID) -> str:
+    return f"hero:{hero_id}"
+
+
+def invalidate_hero_cache(*hero_ids: UUID):
+    # Any write can move a hero in or out of any list page
+    response_cache.invalidate(LIST_CACHE_TAG, *(hero_cache_tag(hero_id) for hero_id in hero_ids))
+
+def cache_metrics():
+    """Response cache counters in the shape of app.core.metrics collectors."""
+    stats = response_cache.stats()
+    yield "response_cache_entries", "gauge", "Cached responses", [({}, stats["entries"])]
+    yield "response_cache_bytes", "gauge", "Bytes of cached responses", [({}, stats["bytes"])]
+    for key in ("hits", "misses", "evictions", "invalidations"):
+        yield f"response_cache_{key}_total", "counter", f"Response cache {key}", [({}, stats[key])]
+    flights = fills.stats()
+    yield "response_cache_fills_in_flight", "gauge", "Cache misses being filled", [({}, flights["in_flight"])]
+    yield "response_cache_fills_total", "counter", "Cache misses filled from the database", [({}, flights["leaders"])]
+    yield "response_cache_coalesced_total", "counter", "Cache misses that waited for an identical fill", [({}, flights["coalesced"])]
+    yield "response_cache_fill_timeouts_total", "counter", "Waits for an identical fill that timed out", [({}, flights["timeouts"])]
+    yield "response_cache_fill_errors_total", "counter", "Fills that failed, for their caller and every waiter", [({}, flights["errors"])]
@@ -0,0 +1,122 @@
+import zlib
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # optional, br is not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, zstd is not offered without it
+    zstandard = None
+
+# Server preference when the client accepts several encodings with the same q
+ENCODINGS: List[str] = [name for name, codec in (("br", brotli), ("zstd", zstandard), ("gzip", zlib)) if codec]
+
+# Levels for bodies compressed on every response, and for the copies kept in the response cache
+FAST_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+BEST_LEVELS = {"br": 9, "zstd": 12, "gzip": 9}
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    # Compressed event streams would sit in the compressor buffer instead of reaching the client
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith("text/event-stream")
+
+
+def parse_qualities(header: str) -> Dict[str, float]:
+    """`gzip;q=0.5, br` -> {"gzip": 0.5, "br": 1.0}; a malformed q counts as 0."""
+    qualities = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[name] = q
+    return qualities
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best available encoding allowed by an Accept-Encoding header, None for identity."""
+    if not accept_encoding or not ENCODINGS:
+        return None
+    qualities = parse_qualities(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = qualities.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    level = (BEST_LEVELS if best else FAST_LEVELS)[encoding]
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    """Incremental compression of a streamed body, one chunk at a time."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        level = FAST_LEVELS[encoding]
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(chunk)
+        return self.compressor.compress(chunk)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def with_encoding(etag: str, encoding: str) -> str:
+    """Strong ETag of the `encoding` variant of a representation: "abc" -> "abc-gzip"."""
+    if not etag.startswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def without_encoding(etag: str) -> str:
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
@@ -1,14 +1,98 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, Literal
 
 class Settings(BaseSettings):
     database_url: str
+    # Set to false to run handlers on the sync engine through the threadpool
+    database_async: bool = True
+    # Comma-separated read replicas used by the read-only handlers, empty for none
+    database_replica_urls: str = ""
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    # Seconds before a pooled connection is replaced, -1 to keep it forever
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Postgres statement_timeout in milliseconds, 0 for no limit
+    db_statement_timeout_ms: int = 0
+    # Slow-query log and per-route query budgets (app.db.diagnostics)
+    db_diagnostics: bool = False
+    db_slow_query_ms: float = 100.0
+    # Share of slow SELECTs run again under EXPLAIN (ANALYZE, BUFFERS), 0 for none
+    db_explain_sample_rate: float = 0.0
+    # Statements per request before it is flagged, overridden per "METHOD /route" (JSON in the environment)
+    db_query_budget: int = 10
+    db_query_budgets: Dict[str, int] = {}
+    # Same statement run this many times in one request is reported as a likely N+1
+    db_repeated_query_threshold: int = 3
+    # Seconds between two health checks of a replica
+    replica_health_check_seconds: float = 5.0
+    # Reads stay on the primary for this long after a commit, to hide replication lag
+    replica_read_after_write_seconds: float = 2.0
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Verified token payloads kept in memory, 0 to decode every request
+    token_cache_max_entries: int = 1024
     admin_password: str
     upload_dir: str = "./uploads"
+    # Hand /uploads transfers to the reverse proxy: "x-accel-redirect" (nginx), "x-sendfile", or "" to stream them from here
+    uploads_offload: Literal["", "x-accel-redirect", "x-sendfile"] = ""
+    # Internal nginx location aliased to upload_dir, for x-accel-redirect
+    uploads_accel_prefix: str = "/_uploads"
+    # Worker processes of the jobs' CPU-bound work (image resizing)
+    image_workers: int = 2
+    # Background jobs (app.services.jobs); set jobs_enabled to false to leave them to other processes
+    jobs_enabled: bool = True
+    # Jobs run at once per process, and threads for their blocking I/O
+    job_workers: int = 2
+    job_thread_workers: int = 4
+    # Seconds between two looks at the jobs table when nothing wakes the runner
+    job_poll_seconds: float = 5.0
+    # A running job not renewed for this long is taken up again by another runner
+    job_lease_seconds: float = 60.0
+    # Retry delay doubles from the base at each failed attempt, up to the max
+    job_retry_base_seconds: float = 5.0
+    job_retry_max_seconds: float = 300.0
+    # Shutdown waits this long for running jobs, then puts them back in the queue
+    job_shutdown_timeout_seconds: float = 30.0
+    max_upload_bytes: int = 10 * 1024 * 1024
     cors_origins: str = "*"
+    # Prometheus metrics on /metrics
+    metrics_enabled: bool = True
+    heroes_page_size: int = 50
+    heroes_max_page_size: int = 200
+    # Ids resolved by one GET/POST /api/heroes/batch
+    heroes_batch_max_ids: int = 500
+    bulk_max_items: int = 5000
+    bulk_batch_size: int = 500
+    transfer_batch_size: int = 1000
+    response_cache_max_entries: int = 512
+    response_cache_max_bytes: int = 32 * 1024 * 1024
+    response_cache_ttl_seconds: float = 60.0
+    # Concurrent identical cache misses share one query; waiters give up with 503 after the timeout
+    coalesce_enabled: bool = True
+    coalesce_timeout_seconds: float = 10.0
+    # gzip (and br/zstd when brotli/zstandard are installed) from Accept-Encoding
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+    # Heroes per page of GET /api/heroes/changes
+    changes_page_size: int = 1000
+    # Writes whose transaction takes longer than this to commit can be missed by a delta sync
+    changes_lag_seconds: float = 5.0
+    # Hero change events kept for Last-Event-ID resume, and pending per stream before it is dropped
+    events_replay_size: int = 1000
+    events_queue_size: int = 256
+    # Comment line sent on idle event streams so that proxies keep them open
+    events_keepalive_seconds: float = 15.0
+    # Full reload of the in-memory skill matrix, on top of the per-hero refreshes
+    team_matrix_max_age_seconds: float = 300.0
+    team_search_max_nodes: int = 200_000
+    # File the skill matrix is saved to at each full reload, and mapped from by starting workers; empty for none
+    skill_matrix_path: str = ""
+    # Largest k of GET /api/heroes/{id}/similar
+    heroes_similar_max_k: int = 100
     
     class Config:
         env_file = ".env"
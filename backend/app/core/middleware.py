@@ -0,0 +1,142 @@
+from typing import Dict
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette.responses import PlainTextResponse
+from app.core.compression import StreamCompressor, choose_encoding, compress, is_compressible, with_encoding
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies above a per-path-prefix limit while they stream in.
+
+    A declared Content-Length over the limit is refused before anything is read;
+    otherwise the received bytes are counted and the request fails with 413 as
+    soon as the limit is crossed, so an oversized upload is never fully spooled.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    def limit_for(self, path: str):
+        for prefix, limit in self.limits.items():
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            declared = int(dict(scope["headers"]).get(b"content-length", 0))
+        except ValueError:
+            declared = -1
+        if declared < 0:
+            response = PlainTextResponse("Invalid Content-Length", status_code=400)
+            await response(scope, receive, send)
+            return
+        if declared > limit:
+            response = PlainTextResponse("Request body too large", status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts (br, zstd, gzip).
+
+    Bodies under `minimum_size`, non-text media types and responses that already
+    carry a Content-Encoding (the gzip export, cached entries compressed by
+    app.core.cache) go out unchanged. Streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        start: Message = {}
+        compressor = None
+        passthrough = False
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                message["headers"] = headers.raw
+                status = message["status"]
+                if (
+                    status < 200 or status in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type", ""))
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                if "accept-encoding" not in headers.get("vary", "").lower():
+                    headers.add_vary_header("Accept-Encoding")
+                if encoding is None:
+                    passthrough = True
+                    await send(message)
+                    return
+                # Held back until the first body chunk tells whether it is worth it
+                start.update(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers:
+                    headers["ETag"] = with_encoding(headers["etag"], encoding)
+                if not more_body:
+                    body = compress(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    passthrough = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                compressor = StreamCompressor(encoding)
+                await send(start)
+
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
@@ -1,5 +1,9 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Dict, Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
@@ -22,9 +26,88 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_token(token: str):
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class VerifiedTokenCache:
+    """Payloads of tokens whose signature was already checked, kept until their `exp`.
+
+    Tokens are keyed by digest so that the cache never holds usable credentials.
+    Revoked digests are remembered until the token would have expired anyway;
+    app.services.revocations shares them with the other workers.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self.revoked: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str) -> Optional[dict]:
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self.entries[digest]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, digest: str, payload: dict) -> None:
+        if self.max_entries <= 0 or not isinstance(payload.get("exp"), (int, float)):
+            return
+        with self.lock:
+            self.entries[digest] = (payload, float(payload["exp"]))
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def revoke(self, digest: str, expires_at: float) -> None:
+        now = time.time()
+        with self.lock:
+            self.entries.pop(digest, None)
+            self.revoked = {d: exp for d, exp in self.revoked.items() if exp > now}
+            self.revoked[digest] = expires_at
+
+    def is_revoked(self, digest: str) -> bool:
+        return digest in self.revoked
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "revoked": len(self.revoked), "hits": self.hits, "misses": self.misses}
+
+token_cache = VerifiedTokenCache(settings.token_cache_max_entries)
+
+def decode_token(token: str):
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def verify_token(token: str):
+    digest = token_digest(token)
+    if token_cache.is_revoked(digest):
+        return None
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is not None:
+            token_cache.set(digest, payload)
+    return payload
+
+def revoke_token(token: str) -> Optional[Tuple[str, float]]:
+    """Refuse `token` in this process from now on; returns its digest and expiry, or None if it is invalid."""
+    payload = decode_token(token)
+    expires_at = payload.get("exp", 0) if payload else 0
+    if not expires_at:
+        return None
+    digest = token_digest(token)
+    token_cache.revoke(digest, float(expires_at))
+    return digest, float(expires_at)
\ No newline at end of file
@@ -0,0 +1,70 @@
+from typing import Any, Dict, List
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from pydantic_core import to_json
+from app.core.compression import parse_qualities
+
+try:
+    import orjson
+except ImportError:  # optional, pydantic-core's encoder is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional, heroes are only served as JSON without it
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON of plain data (dicts, lists, datetimes, UUIDs...) in one native call.
+
+    Rows fetched as column tuples are encoded as they are, without building
+    Pydantic models or walking them with jsonable_encoder first.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder)
+    return to_json(content, fallback=jsonable_encoder)
+
+
+def packb(content: Any) -> bytes:
+    """MessagePack of the same data; UUIDs and datetimes become the strings JSON clients get."""
+    return msgpack.packb(content, default=jsonable_encoder)
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    return packb(content) if media_type == MSGPACK_MEDIA_TYPE else dumps(content)
+
+
+def join_array(items: List[bytes], media_type: str) -> bytes:
+    """Array of values already encoded in `media_type`, spliced without decoding them."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.Packer().pack_array_header(len(items)) + b"".join(items)
+    return b"[" + b",".join(items) + b"]"
+
+
+def join_object(members: Dict[str, bytes], media_type: str) -> bytes:
+    """Object whose member values are already encoded in `media_type`."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.Packer().pack_map_header(len(members)) + b"".join(packb(name) + value for name, value in members.items())
+    return b"{" + b",".join(dumps(name) + b":" + value for name, value in members.items()) + b"}"
+
+
+def negotiate_media_type(request: Request) -> str:
+    """MessagePack when the Accept header asks for it at least as much as JSON, else JSON.
+
+    Browsers and clients that send `*/*` keep getting JSON: MessagePack is
+    only returned when it is named explicitly.
+    """
+    accept = request.headers.get("accept")
+    if msgpack is None or not accept:
+        return JSON_MEDIA_TYPE
+    qualities = parse_qualities(accept)
+    msgpack_q = max(qualities.get(name, 0.0) for name in MSGPACK_ALIASES)
+    json_q = qualities.get(JSON_MEDIA_TYPE, qualities.get("application/*", qualities.get("*/*", 0.0)))
+    if msgpack_q > 0 and msgpack_q >= json_q:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
@@ -0,0 +1,195 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Deque, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+from app.core.metrics import db_query_budget_exceeded, db_slow_queries, route_label
+
+logger = logging.getLogger(__name__)
+
+# Slow queries kept for GET /api/heroes/db/stats
+RECENT_SLOW_QUERIES = 50
+EXPLAIN_SAVEPOINT = "diagnostics_explain"
+
+
+@dataclass
+class RequestTrace:
+    scope: Scope
+    statements: List[Tuple[str, float]] = field(default_factory=list)
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """Statements run at least `db_repeated_query_threshold` times: the N of an N+1."""
+        counts = Counter(statement for statement, _ in self.statements)
+        return [(statement, n) for statement, n in counts.most_common() if n >= settings.db_repeated_query_threshold]
+
+
+# Statements of the request being handled, see QueryBudgetMiddleware
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+# Open assert_max_queries blocks; a list rather than a context variable, since
+# test clients run the application in another thread
+_captures: List[List[str]] = []
+_captures_lock = threading.Lock()
+recent_slow_queries: Deque[dict] = deque(maxlen=RECENT_SLOW_QUERIES)
+
+
+def redact(parameters, executemany: bool) -> object:
+    """Bound parameters reduced to their types, so that no hero data reaches the logs."""
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return parameters
+
+
+def explainable(conn, statement: str, context) -> bool:
+    # ANALYZE runs the statement again: only plain SELECTs, and only on Postgres
+    return (
+        conn.dialect.name == "postgresql"
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and not (context.isinsert or context.isupdate or context.isdelete)
+    )
+
+
+def explain(conn, statement: str, parameters) -> Optional[str]:
+    """EXPLAIN (ANALYZE, BUFFERS) of a statement, on the connection that just ran it.
+
+    Issued on the DBAPI cursor, so it is not traced itself, and inside a
+    savepoint, so that a failing EXPLAIN leaves the request's transaction usable.
+    """
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        # Fails, harmlessly, outside of a transaction block
+        cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    except Exception:
+        cursor.close()
+        logger.warning("Could not EXPLAIN slow query", exc_info=True)
+        return None
+    try:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+    except Exception:
+        cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        logger.warning("Could not EXPLAIN slow query", exc_info=True)
+        return None
+    else:
+        cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        return plan
+    finally:
+        cursor.close()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("diagnostics_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["diagnostics_start"].pop()
+    trace = current_trace.get()
+    if trace is not None:
+        trace.statements.append((statement, elapsed))
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.append(statement)
+
+    if not settings.db_diagnostics or elapsed * 1000 < settings.db_slow_query_ms:
+        return
+    route = route_label(trace.scope) if trace is not None else "background"
+    db_slow_queries.inc(route)
+    plan = None
+    if random.random() < settings.db_explain_sample_rate and explainable(conn, statement, context):
+        plan = explain(conn, statement, parameters)
+    recent_slow_queries.append({
+        "route": route,
+        "milliseconds": round(elapsed * 1000, 3),
+        "statement": statement,
+        "plan": plan,
+    })
+    logger.warning(
+        "Slow query (%.1f ms) on %s: %s -- parameters: %s%s",
+        elapsed * 1000, route, statement, redact(parameters, executemany), f"\n{plan}" if plan else "",
+    )
+
+
+def instrument(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def query_budget(method: str, route: str) -> int:
+    return settings.db_query_budgets.get(f"{method} {route}", settings.db_query_budget)
+
+
+class QueryBudgetMiddleware:
+    """Flag requests that run more SQL statements than their route's budget.
+
+    The warning names the statements repeated within the request, which is
+    how an N+1 query pattern shows up.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope)
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_trace.reset(token)
+            method, route = scope["method"], route_label(scope)
+            budget = query_budget(method, route)
+            if len(trace.statements) > budget:
+                db_query_budget_exceeded.inc(method, route)
+                repeated = "; ".join(f"{n}x {statement}" for statement, n in trace.repeated())
+                logger.warning(
+                    "%s %s ran %d queries (budget %d, %.1f ms)%s",
+                    method, route, len(trace.statements), budget,
+                    sum(seconds for _, seconds in trace.statements) * 1000,
+                    f", repeated: {repeated}" if repeated else "",
+                )
+
+
+def diagnostics_stats() -> dict:
+    return {"enabled": settings.db_diagnostics, "slow_queries": list(recent_slow_queries)}
+
+
+@contextmanager
+def assert_max_queries(limit: int, engines: Optional[List[Engine]] = None) -> Iterator[List[str]]:
+    """Fail with AssertionError when the block runs more than `limit` SQL statements.
+
+    Works with or without DB_DIAGNOSTICS; for use in tests::
+
+        with assert_max_queries(1):
+            client.get(f"/api/heroes/{hero_id}")
+    """
+    from app.db.session import primary_engine
+
+    for engine in engines or [primary_engine]:
+        instrument(engine)
+    statements: List[str] = []
+    with _captures_lock:
+        _captures.append(statements)
+    try:
+        yield statements
+    finally:
+        with _captures_lock:
+            _captures.remove(statements)
+    if len(statements) > limit:
+        listing = "\n".join(f"  {statement}" for statement in statements)
+        raise AssertionError(f"{len(statements)} queries run, at most {limit} expected:\n{listing}")
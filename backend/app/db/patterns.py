@@ -0,0 +1,14 @@
+"""LIKE / ILIKE patterns built from user input; use them with escape="\\"."""
+import re
+
+LIKE_SPECIAL = re.compile(r"[\\%_]")
+
+
+def escape_like(value: str) -> str:
+    """`value` with its own %, _ and \\ taken literally."""
+    return LIKE_SPECIAL.sub(r"\\\g<0>", value)
+
+
+def substring_pattern(value: str) -> str:
+    """Pattern matching `value` anywhere."""
+    return "%" + escape_like(value) + "%"
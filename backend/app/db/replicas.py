@@ -0,0 +1,152 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db import session as primary
+from app.db.diagnostics import diagnostics_stats
+from app.db.session import PoolTelemetry, SyncSessionAdapter, db_session, make_engine
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_TIMEOUT = 1.0
+
+class Replica:
+    def __init__(self, url: str, is_async: bool):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.is_async = is_async
+        self.engine = make_engine(url, is_async)
+        self.sync_engine = self.engine.sync_engine if is_async else self.engine
+        self.telemetry = PoolTelemetry(self.sync_engine)
+        if is_async:
+            self.sessions = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        else:
+            self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.healthy = True
+        self.checked_at: Optional[float] = None
+        self.failures = 0
+
+    async def ping(self):
+        if self.is_async:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return
+
+        def ping_sync():
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        await run_in_threadpool(ping_sync)
+
+    async def check(self) -> bool:
+        # Stamped first so that concurrent requests do not probe it again meanwhile
+        self.checked_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self.ping(), HEALTH_CHECK_TIMEOUT)
+        except (asyncio.TimeoutError, DBAPIError, OSError):
+            if self.healthy:
+                logger.warning("Read replica %s failed its health check", self.name)
+            self.mark_down()
+        else:
+            self.healthy = True
+        return self.healthy
+
+    def mark_down(self):
+        self.healthy = False
+        self.checked_at = time.monotonic()
+        self.failures += 1
+
+    @asynccontextmanager
+    async def session(self):
+        if self.is_async:
+            async with self.sessions() as db:
+                yield db
+            return
+        db = SyncSessionAdapter(self.sessions())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    def stats(self) -> dict:
+        return {"name": self.name, "healthy": self.healthy, "failures": self.failures, "pool": self.telemetry.stats()}
+
+class ReplicaSet:
+    """Round-robin over the read replicas that passed their last health check.
+
+    A replica is probed again once its last check is older than
+    `replica_health_check_seconds`, so a failed one comes back on its own.
+    """
+
+    def __init__(self, urls: List[str], is_async: bool):
+        self.replicas = [Replica(url, is_async) for url in urls]
+        self.turn = itertools.count()
+
+    async def pick(self) -> Optional[Replica]:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self.turn) % len(self.replicas)]
+            if replica.checked_at is None or time.monotonic() - replica.checked_at > settings.replica_health_check_seconds:
+                await replica.check()
+            if replica.healthy:
+                return replica
+        return None
+
+    def stats(self) -> List[dict]:
+        return [replica.stats() for replica in self.replicas]
+
+replica_urls = [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()]
+replica_set = ReplicaSet(replica_urls, settings.database_async) if replica_urls else None
+
+async def get_read_db():
+    """Session for read-only handlers: the next healthy replica, else the primary.
+
+    Reads stay on the primary right after a commit of this process, so that a
+    lagging replica does not refill the response cache with the previous state.
+    """
+    replica = None
+    if replica_set and time.monotonic() - primary.last_primary_commit > settings.replica_read_after_write_seconds:
+        replica = await replica_set.pick()
+    if replica is None:
+        async with db_session() as db:
+            yield db
+        return
+    try:
+        async with replica.session() as db:
+            yield db
+    except DBAPIError as e:
+        # Taken out of the rotation until its next health check
+        if e.connection_invalidated or isinstance(e, OperationalError):
+            replica.mark_down()
+        raise
+
+def database_stats() -> dict:
+    return {
+        "primary": primary.primary_telemetry.stats(),
+        "replicas": replica_set.stats() if replica_set else [],
+        "diagnostics": diagnostics_stats(),
+    }
+
+def pool_metrics():
+    """Pool gauges and counters in the shape of app.core.metrics collectors."""
+    pools = [("primary", primary.primary_telemetry.stats())]
+    if replica_set:
+        pools += [(replica.name, replica.telemetry.stats()) for replica in replica_set.replicas]
+    for key, kind in (
+        ("checkedout", "gauge"), ("checkedin", "gauge"), ("overflow", "gauge"),
+        ("connects", "counter"), ("checkouts", "counter"), ("invalidations", "counter"),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        samples = [({"database": name}, stats[key]) for name, stats in pools if key in stats]
+        yield f"db_pool_{key}{suffix}", kind, f"Connection pool {key}", samples
+    if replica_set:
+        yield "db_replica_healthy", "gauge", "1 when the replica passed its last health check", [
+            ({"database": replica.name}, int(replica.healthy)) for replica in replica_set.replicas
+        ]
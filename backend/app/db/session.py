@@ -1,13 +1,179 @@
-from sqlalchemy import create_engine
+import time
+from contextlib import asynccontextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.db import diagnostics
 
-engine = create_engine(settings.database_url)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver of a database URL for its asyncio counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def engine_options(url: str, is_async: bool) -> dict:
+    """Pool and timeout settings for an engine on `url`."""
+    backend = make_url(url).get_backend_name()
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+    if settings.db_statement_timeout_ms and backend == "postgresql":
+        timeout = str(settings.db_statement_timeout_ms)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+class PoolTelemetry:
+    """Counters of pool events for one engine, next to the pool's own gauges."""
+
+    def __init__(self, engine: Engine):
+        self.pool = engine.pool
+        self.connects = self.checkouts = self.invalidations = 0
+        event.listen(engine, "connect", self.on_connect)
+        event.listen(engine, "checkout", self.on_checkout)
+        event.listen(engine, "invalidate", self.on_invalidate)
+
+    def on_connect(self, *args):
+        self.connects += 1
+
+    def on_checkout(self, *args):
+        self.checkouts += 1
+
+    def on_invalidate(self, *args):
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        stats = {"connects": self.connects, "checkouts": self.checkouts, "invalidations": self.invalidations}
+        for gauge in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(self.pool, gauge):
+                stats[gauge] = getattr(self.pool, gauge)()
+        return stats
+
+def make_engine(url: str, is_async: bool):
+    if is_async:
+        engine = create_async_engine(async_database_url(url), **engine_options(url, True))
+    else:
+        engine = create_engine(url, **engine_options(url, False))
+    if settings.db_diagnostics:
+        diagnostics.instrument(engine.sync_engine if is_async else engine)
+    return engine
+
+engine = make_engine(settings.database_url, False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+if settings.database_async:
+    async_engine = make_engine(settings.database_url, True)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+# The engine that serves requests on the primary
+primary_engine = async_engine.sync_engine if async_engine is not None else engine
+primary_telemetry = PoolTelemetry(primary_engine)
+
+# Monotonic time of the last commit on the primary, see app.db.replicas
+last_primary_commit = 0.0
+
+@event.listens_for(primary_engine, "commit")
+def record_primary_commit(conn):
+    global last_primary_commit
+    last_primary_commit = time.monotonic()
+
+class SyncResultAdapter:
+    """Async partition iteration over a sync Result, one fetch per threadpool call."""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def partitions(self, size):
+        while True:
+            rows = await run_in_threadpool(self.result.fetchmany, size)
+            if not rows:
+                break
+            yield rows
+
+class SyncSessionAdapter:
+    """Expose a sync Session through the awaitable subset of the AsyncSession API.
+
+    Used when `DATABASE_ASYNC=false`: handlers keep a single async code path and
+    the blocking calls are pushed to the threadpool.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def add(self, instance):
+        self.session.add(instance)
+
+    def add_all(self, instances):
+        self.session.add_all(instances)
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.session.execute, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await run_in_threadpool(self.session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await run_in_threadpool(self.session.scalars, *args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        return SyncResultAdapter(await run_in_threadpool(self.session.execute, *args, **kwargs))
+
+    async def get(self, *args, **kwargs):
+        return await run_in_threadpool(self.session.get, *args, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.session.flush)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.session.refresh, instance)
+
+    async def commit(self):
+        await run_in_threadpool(self.session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.session.close)
+
+async def get_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SyncSessionAdapter(SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+# Same session as get_db, for code running outside a request (background tasks)
+db_session = asynccontextmanager(get_db)
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
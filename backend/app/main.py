@@ -1,9 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from app.api.endpoints import heroes, auth
+from fastapi.responses import PlainTextResponse
+from app.api.endpoints import heroes, auth, jobs, teams, transfer, uploads
+from app.core.cache import cache_metrics
 from app.core.config import settings
-import os
+from app.core.metrics import MetricsMiddleware, instrument_engine, registry
+from app.core.middleware import BodySizeLimitMiddleware, CompressionMiddleware
+from app.db.diagnostics import QueryBudgetMiddleware
+from app.db.replicas import pool_metrics, replica_set
+from app.db.session import primary_engine
+from app.services.events import event_metrics, hero_events
+from app.services.jobs import job_metrics, job_runner
+from app.services.revocations import load_revocations
+# Registers the hero_image job handler
+import app.services.images  # noqa: F401
 
 app = FastAPI(
     title="Les héros de la Cyprine API",
@@ -11,6 +21,13 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Refuse oversized uploads while they stream in (multipart framing gets some slack).
+# Added before CORS, which wraps it, so that browsers can read its 413
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/api/heroes/upload-image/": settings.max_upload_bytes + 64 * 1024},
+)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -18,15 +35,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],
 )
 
-# Mount static files for uploads
-if os.path.exists(settings.upload_dir):
-    app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
+# Responses served from the response cache arrive already compressed and pass through
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
+
+# Slow-query log and per-route query budgets; the engines are instrumented by make_engine
+if settings.db_diagnostics:
+    app.add_middleware(QueryBudgetMiddleware)
+
+# Outermost, so that the measured latency covers the other middlewares
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    for engine in [primary_engine] + [replica.sync_engine for replica in (replica_set.replicas if replica_set else [])]:
+        instrument_engine(engine)
+    registry.add_collector(pool_metrics)
+    registry.add_collector(cache_metrics)
+    registry.add_collector(event_metrics)
+    registry.add_collector(job_metrics)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
+# Registered before the heroes router so that /export is not taken for a hero id
+app.include_router(transfer.router, prefix="/api/heroes", tags=["heroes"])
 app.include_router(heroes.router, prefix="/api/heroes", tags=["heroes"])
+app.include_router(teams.router, prefix="/api/teams", tags=["teams"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+# Always registered: the upload directory is created by the first upload
+app.include_router(uploads.router, prefix="/uploads")
+
+@app.on_event("startup")
+async def start_hero_events():
+    # LISTEN for the hero events and token revocations of the other workers (Postgres only)
+    hero_events.start()
+    await load_revocations()
+
+@app.on_event("shutdown")
+async def stop_hero_events():
+    await hero_events.stop()
+
+@app.on_event("startup")
+async def start_job_runner():
+    job_runner.start()
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    # Running jobs get JOB_SHUTDOWN_TIMEOUT_SECONDS to finish, then go back to the queue
+    await job_runner.stop()
 
 @app.get("/")
 def read_root():
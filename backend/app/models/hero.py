@@ -1,11 +1,26 @@
-from sqlalchemy import Column, String, Text, JSON, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Computed, String, Text, JSON, DateTime, Float, Index, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID, TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 import uuid
 from app.db.base import Base
 
+# Text search configuration created by the a25d2078360c migration (french stemming + unaccent)
+SEARCH_CONFIG = "french_unaccent"
+
 class Hero(Base):
     __tablename__ = "heroes"
+    __table_args__ = (
+        Index("ix_heroes_created_at_id", "created_at", "id"),
+        Index("ix_heroes_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_heroes_nickname_trgm", text("f_unaccent(lower(nickname)) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_heroes_nickname_like", "nickname", postgresql_using="gin", postgresql_ops={"nickname": "gin_trgm_ops"}),
+        Index("ix_heroes_lastname_like", "lastname", postgresql_using="gin", postgresql_ops={"lastname": "gin_trgm_ops"}),
+        Index("ix_heroes_skills", "skills", postgresql_using="gin"),
+        Index("ix_heroes_avg_skill_id", "avg_skill", "id"),
+        Index("ix_heroes_max_skill_id", "max_skill", "id"),
+        Index("ix_heroes_updated_at_id", "updated_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     firstname = Column(String(100), nullable=False)
@@ -13,6 +28,28 @@ class Hero(Base):
     nickname = Column(String(100), unique=True, nullable=False)
     description = Column(Text, nullable=False)
     profile_picture = Column(String(500))
-    skills = Column(JSON, default={})
+    profile_picture_variants = Column(JSON)
+    skills = Column(JSONB, default={})
+    # Aggregates of the numeric skill levels (0 without skills), maintained by Postgres
+    avg_skill = Column(Float, Computed("hero_skill_avg(skills)", persisted=True))
+    max_skill = Column(Float, Computed("hero_skill_max(skills)", persisted=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    # Set on insert too: the change token of GET /api/heroes/changes
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    # Maintained by Postgres; never loaded with the hero
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(nickname, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(firstname, '') || ' ' || coalesce(lastname, '')), 'B') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(description, '')), 'C')",
+        persisted=True,
+    )))
+
+class HeroTombstone(Base):
+    """A deleted hero, recorded by the heroes_tombstone trigger (fb13b4be7053 migration).
+
+    Pruned after hero_tombstone_retention() by the heroes_tombstone_prune trigger (c5b695e42efe).
+    """
+    __tablename__ = "hero_tombstones"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
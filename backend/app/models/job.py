@@ -0,0 +1,31 @@
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+import uuid
+from app.db.base import Base
+
+class Job(Base):
+    """Background work run by app.services.jobs after the response is sent."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim order of the runners: due jobs first
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(50), nullable=False)
+    # queued -> running -> succeeded | failed; a failed attempt goes back to queued until max_attempts
+    status = Column(String(20), nullable=False, default="queued")
+    payload = Column(JSONB, nullable=False, default={})
+    result = Column(JSONB)
+    error = Column(Text)
+    progress = Column(Float, nullable=False, default=0.0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    # Not claimed before this time: retry backoff
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # A running job whose runner stops renewing this lease is claimed again
+    locked_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, DateTime, String
+from app.db.base import Base
+
+class RevokedToken(Base):
+    """A token refused by every worker until it expires, written by POST /api/auth/logout."""
+    __tablename__ = "revoked_tokens"
+
+    # sha256 of the token, as in app.core.security: the table never holds usable credentials
+    digest = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Literal, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -22,8 +22,75 @@ class HeroUpdate(HeroBase):
 
 class Hero(HeroBase):
     id: UUID
+    # {"thumb" | "card" | "detail": {"webp" | "jpeg": url}}
+    profile_picture_variants: Optional[Dict[str, Dict[str, str]]] = None
+    avg_skill: Optional[float] = None
+    max_skill: Optional[float] = None
     created_at: datetime
     updated_at: Optional[datetime]
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class HeroSearchHit(Hero):
+    # ts_rank_cd for full-text queries, trigram similarity for autocomplete
+    score: float
+
+class SimilarHero(BaseModel):
+    id: UUID
+    nickname: str
+    # Cosine similarity (higher is closer) or euclidean distance (lower is closer) of the normalized skill vectors
+    score: float
+
+class SimilarHeroes(BaseModel):
+    metric: Literal["cosine", "euclidean"]
+    heroes: List[SimilarHero]
+
+class HeroBatchRequest(BaseModel):
+    ids: List[UUID]
+
+class HeroBatch(BaseModel):
+    # In the order of the requested ids, without the missing ones
+    heroes: List[Hero]
+    missing: List[UUID]
+
+class HeroChanges(BaseModel):
+    heroes: List[Hero]
+    deleted: List[UUID]
+    # Change token of the next request; follow it at once while has_more is true
+    next: str
+    has_more: bool
+
+class HeroBulkRequest(BaseModel):
+    # "create" reports existing nicknames as conflicts, "upsert" updates them
+    mode: Literal["create", "upsert"] = "create"
+    heroes: List[HeroCreate]
+
+class HeroBulkItem(BaseModel):
+    index: int
+    nickname: str
+    status: Literal["created", "updated", "conflict", "duplicate"]
+    id: Optional[UUID] = None
+
+class HeroBulkResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    items: List[HeroBulkItem]
+
+class HeroImportError(BaseModel):
+    line: int
+    error: str
+
+class HeroImportProgress(BaseModel):
+    import_id: str
+    status: Literal["running", "completed", "failed"]
+    # Non-empty lines read from the stream, and the last one whose batch is committed;
+    # an interrupted import resumes with ?skip=<lines_committed>
+    lines_read: int = 0
+    lines_committed: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[HeroImportError] = []
+    detail: Optional[str] = None
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Literal, Optional
+from datetime import datetime
+from uuid import UUID
+
+class Job(BaseModel):
+    id: UUID
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    # 0 to 1, as reported by the job
+    progress: float
+    attempts: int
+    max_attempts: int
+    result: Optional[Dict[str, Any]] = None
+    # Error of the last failed attempt
+    error: Optional[str] = None
+    run_after: datetime
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
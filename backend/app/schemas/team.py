@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List
+from uuid import UUID
+
+class TeamOptimizeRequest(BaseModel):
+    size: int = Field(3, ge=1, le=8)
+    required: List[UUID] = []
+    excluded: List[UUID] = []
+    # skill -> weight; without weights a hero scores its average skill level
+    weights: Dict[str, float] = {}
+    # skill -> level that at least one member must reach
+    min_coverage: Dict[str, float] = {}
+    top_k: int = Field(5, ge=1, le=50)
+
+class TeamMember(BaseModel):
+    id: UUID
+    nickname: str
+    score: float
+
+class Team(BaseModel):
+    score: float
+    members: List[TeamMember]
+    # Best level of the team in each skill of min_coverage
+    coverage: Dict[str, float]
+
+class TeamOptimizeResult(BaseModel):
+    teams: List[Team]
+    candidates: int
+    explored: int
+    # False when the search budget ran out before every branch was bounded
+    exhaustive: bool
@@ -0,0 +1,75 @@
+from dataclasses import dataclass, field
+from typing import List, Sequence
+from uuid import UUID, uuid4
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.hero import Hero
+from app.schemas.hero import HeroCreate, HeroBulkItem
+
+
+@dataclass
+class BulkWrite:
+    items: List[HeroBulkItem] = field(default_factory=list)
+    created: int = 0
+    updated_ids: List[UUID] = field(default_factory=list)
+
+    @property
+    def updated(self) -> int:
+        return len(self.updated_ids)
+
+    @property
+    def created_ids(self) -> List[UUID]:
+        return [item.id for item in self.items if item.status == "created"]
+
+    @property
+    def written_ids(self) -> List[UUID]:
+        return [item.id for item in self.items if item.status in ("created", "updated")]
+
+    @property
+    def failed(self) -> int:
+        return len(self.items) - self.created - self.updated
+
+
+async def write_heroes(db: AsyncSession, heroes: Sequence[HeroCreate], mode: str, batch_size: int) -> BulkWrite:
+    """Insert (or upsert on nickname) `heroes` without committing.
+
+    Existing nicknames are found with one set-based lookup per batch and rows are
+    written with batched executemany statements. Items are reported in input order.
+    An upsert only writes the fields the item sets, and drops the picture
+    derivatives when it changes the picture.
+    """
+    nicknames = list(dict.fromkeys(hero.nickname for hero in heroes))
+    existing = {}
+    for start in range(0, len(nicknames), batch_size):
+        batch = nicknames[start:start + batch_size]
+        result = await db.execute(select(Hero.nickname, Hero.id, Hero.profile_picture).where(Hero.nickname.in_(batch)))
+        existing.update({nickname: (hero_id, picture) for nickname, hero_id, picture in result})
+
+    outcome = BulkWrite()
+    inserts, updates, seen = [], [], set()
+    for index, hero in enumerate(heroes):
+        hero_id, picture = existing.get(hero.nickname, (None, None))
+        if hero.nickname in seen:
+            status, hero_id = "duplicate", None
+        elif hero_id is None:
+            status, hero_id = "created", uuid4()
+            inserts.append({"id": hero_id, **hero.dict()})
+        elif mode == "upsert":
+            status = "updated"
+            values = hero.dict(exclude_unset=True)
+            if "profile_picture" in values and values["profile_picture"] != picture:
+                values["profile_picture_variants"] = None
+            updates.append({"id": hero_id, **values})
+        else:
+            status = "conflict"
+        seen.add(hero.nickname)
+        outcome.items.append(HeroBulkItem(index=index, nickname=hero.nickname, status=status, id=hero_id))
+
+    for start in range(0, len(inserts), batch_size):
+        await db.execute(insert(Hero), inserts[start:start + batch_size])
+    for start in range(0, len(updates), batch_size):
+        await db.execute(update(Hero), updates[start:start + batch_size])
+
+    outcome.created = len(inserts)
+    outcome.updated_ids = [row["id"] for row in updates]
+    return outcome
@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.hero import Hero, HeroTombstone
+
+# Sorts before any hero id at the same updated_at
+NIL_ID = UUID(int=0)
+
+Position = Tuple[datetime, UUID]
+
+
+class ChangeTokenExpired(Exception):
+    """The token predates the retained tombstones: deletions may have been lost."""
+
+
+@dataclass
+class Changes:
+    rows: Sequence = ()
+    deleted: List[UUID] = field(default_factory=list)
+    # (updated_at, id) to resume from, as the next change token
+    position: Optional[Position] = None
+    has_more: bool = False
+
+
+async def change_horizon(db: AsyncSession) -> datetime:
+    """Newest position a sync can stop at without missing a write still being committed.
+
+    updated_at is the start time of the writing transaction, so a change can
+    become visible after newer ones; `changes_lag_seconds` leaves them room.
+    """
+    now = await db.scalar(select(func.now()))
+    return now - timedelta(seconds=settings.changes_lag_seconds)
+
+
+async def tombstone_retention(db: AsyncSession) -> timedelta:
+    """How long tombstones are kept: defined once, by the database (c5b695e42efe migration)."""
+    return await db.scalar(select(func.hero_tombstone_retention()))
+
+
+def changed_since(position: Position):
+    updated_at, hero_id = position
+    return tuple_(Hero.updated_at, Hero.id) > tuple_(
+        literal(updated_at, Hero.updated_at.type), literal(hero_id, Hero.id.type)
+    )
+
+
+async def read_changes(db: AsyncSession, columns, since: Optional[Position], limit: int) -> Changes:
+    """Heroes written after `since` in (updated_at, id) order, and the ids deleted meanwhile.
+
+    Only heroes written before the change horizon are read, so that no
+    position handed out goes past it: the heroes of the last few seconds wait
+    for a later sync. A full page resumes right after its last hero, any
+    other at the horizon.
+    """
+    horizon = await change_horizon(db)
+    if since is not None and since[0] < horizon - await tombstone_retention(db):
+        raise ChangeTokenExpired()
+
+    query = select(*columns).where(Hero.updated_at < horizon)
+    if since is not None:
+        query = query.where(changed_since(since))
+    result = await db.execute(query.order_by(Hero.updated_at, Hero.id).limit(limit + 1))
+    changes = Changes(rows=result.all())
+
+    if len(changes.rows) > limit:
+        changes.rows = changes.rows[:limit]
+        changes.position = (changes.rows[-1].updated_at, changes.rows[-1].id)
+        changes.has_more = True
+    else:
+        changes.position = max(since, (horizon, NIL_ID)) if since is not None else (horizon, NIL_ID)
+
+    # A client without a token has no copy to delete from
+    if since is not None:
+        result = await db.execute(
+            select(HeroTombstone.id)
+            .where(HeroTombstone.deleted_at > since[0], HeroTombstone.deleted_at <= changes.position[0])
+            .order_by(HeroTombstone.deleted_at)
+        )
+        changes.deleted = list(result.scalars())
+    return changes
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Set
+from uuid import UUID, uuid4
+from sqlalchemy.engine import make_url
+from app.core.cache import invalidate_hero_cache
+from app.core.config import settings
+from app.core.security import token_cache
+from app.services.teams import mark_heroes_changed
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "hero_events"
+# Logouts, so that every worker refuses the revoked token
+REVOCATION_CHANNEL = "token_revocations"
+# Hero ids per event; keeps NOTIFY payloads well under the 8000 bytes Postgres allows
+MAX_IDS_PER_EVENT = 100
+RECONNECT_DELAY = 1.0
+
+
+@dataclass
+class HeroEvent:
+    id: str
+    type: str
+    ids: List[str]
+
+    def frame(self) -> bytes:
+        """The event as an SSE frame, encoded once and shared by every stream."""
+        data = json.dumps({"type": self.type, "ids": self.ids}, separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.type}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    def __init__(self, size: int):
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(size)
+
+    def push(self, frame: bytes) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            # Too slow: the stream is closed and the client resumes with Last-Event-ID
+            self.close()
+            return False
+
+    def close(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """Fan-out of hero change events to the SSE streams of this process.
+
+    With Postgres, events are published with NOTIFY and every worker receives
+    them on its LISTEN connection, in commit order, so event ids and replay
+    buffers are the same in all workers and a client can resume on any of
+    them. Other databases only reach the streams of the publishing process.
+    The same connection carries the token revocations.
+    """
+
+    def __init__(self, replay_size: int, queue_size: int):
+        self.replay: Deque[HeroEvent] = deque(maxlen=replay_size)
+        self.queue_size = queue_size
+        self.subscriptions: Set[Subscription] = set()
+        self.connection = None
+        self.lock = asyncio.Lock()
+        self.listener: Optional[asyncio.Task] = None
+        self.last_ns = 0
+        # Tags the events of this process; pids repeat across containers and hosts
+        self.origin = uuid4().hex
+        self.delivered = 0
+
+    def next_id(self) -> str:
+        # Unique across workers: publish time in ns, made strictly increasing, and the process tag
+        self.last_ns = max(time.time_ns(), self.last_ns + 1)
+        return f"{self.last_ns}-{self.origin}"
+
+    def dispatch(self, event: HeroEvent) -> None:
+        self.replay.append(event)
+        frame = event.frame()
+        for subscription in list(self.subscriptions):
+            if not subscription.push(frame):
+                self.subscriptions.discard(subscription)
+        self.delivered += 1
+
+    def subscribe(self, last_event_id: Optional[str]):
+        """Register a stream; returns it with the frames missed since `last_event_id`.
+
+        The backlog is None when that event left the replay buffer: the client
+        has to reload the heroes instead.
+        """
+        backlog: Optional[List[bytes]] = []
+        if last_event_id:
+            ids = [event.id for event in self.replay]
+            if last_event_id in ids:
+                backlog = [event.frame() for event in list(self.replay)[ids.index(last_event_id) + 1:]]
+            else:
+                backlog = None
+        subscription = Subscription(self.queue_size)
+        self.subscriptions.add(subscription)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+
+    async def publish(self, type: str, *hero_ids: UUID) -> None:
+        """Announce a committed change of `hero_ids` to every stream of every worker."""
+        ids = [str(hero_id) for hero_id in hero_ids]
+        for start in range(0, len(ids), MAX_IDS_PER_EVENT):
+            event = HeroEvent(self.next_id(), type, ids[start:start + MAX_IDS_PER_EVENT])
+            if self.connection is None or not await self.notify(event):
+                self.dispatch(event)
+
+    async def notify(self, event: HeroEvent) -> bool:
+        payload = json.dumps({"id": event.id, "type": event.type, "ids": event.ids}, separators=(",", ":"))
+        try:
+            async with self.lock:
+                await self.connection.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+            return True
+        except Exception:
+            logger.warning("Could not NOTIFY hero event %s, delivered to this worker only", event.id, exc_info=True)
+            return False
+
+    async def announce_revocation(self, digest: str, expires_at: float) -> None:
+        """Tell the other workers that a token was revoked; already refused by this one."""
+        if self.connection is None:
+            return
+        payload = json.dumps({"digest": digest, "exp": expires_at}, separators=(",", ":"))
+        try:
+            async with self.lock:
+                await self.connection.execute("SELECT pg_notify($1, $2)", REVOCATION_CHANNEL, payload)
+        except Exception:
+            # Stored by the caller: the other workers load it when they start
+            logger.warning("Could not NOTIFY a token revocation", exc_info=True)
+
+    def on_revocation(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+            token_cache.revoke(message["digest"], float(message["exp"]))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed token revocation %r", payload)
+
+    def on_notification(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+            event = HeroEvent(message["id"], message["type"], message["ids"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed hero event %r", payload)
+            return
+        if not event.id.endswith(f"-{self.origin}"):
+            # Written by another worker: its cached copies here are stale too
+            invalidate_hero_cache(*event.ids)
+            mark_heroes_changed(*map(UUID, event.ids))
+        self.dispatch(event)
+
+    async def listen(self, dsn: str) -> None:
+        import asyncpg
+
+        while True:
+            lost = asyncio.get_running_loop().create_future()
+            try:
+                connection = await asyncpg.connect(dsn)
+                connection.add_termination_listener(lambda _: lost.done() or lost.set_result(None))
+                await connection.add_listener(CHANNEL, self.on_notification)
+                await connection.add_listener(REVOCATION_CHANNEL, self.on_revocation)
+                self.connection = connection
+                await lost
+                logger.warning("Hero event listener lost its connection, reconnecting")
+            except asyncio.CancelledError:
+                if self.connection is not None:
+                    await self.connection.close()
+                raise
+            except Exception:
+                logger.warning("Hero event listener could not connect, retrying", exc_info=True)
+            self.connection = None
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def start(self) -> None:
+        url = make_url(settings.database_url)
+        if url.get_backend_name() != "postgresql" or self.listener is not None:
+            return
+        # Drawn again in the worker itself, in case the broker was created before a fork
+        self.origin = uuid4().hex
+        # asyncpg takes plain postgresql:// DSNs, whatever driver the URL names
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self.listener = asyncio.create_task(self.listen(dsn))
+
+    async def stop(self) -> None:
+        if self.listener is not None:
+            self.listener.cancel()
+            try:
+                await self.listener
+            except asyncio.CancelledError:
+                pass
+            self.listener = None
+        # Open streams end instead of waiting for events that will not come
+        for subscription in self.subscriptions:
+            subscription.close()
+        self.subscriptions.clear()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscriptions),
+            "replay": len(self.replay),
+            "delivered": self.delivered,
+            "listening": self.connection is not None,
+        }
+
+
+hero_events = EventBroker(settings.events_replay_size, settings.events_queue_size)
+
+
+def event_metrics():
+    """Event stream gauges in the shape of app.core.metrics collectors."""
+    stats = hero_events.stats()
+    yield "hero_event_streams", "gauge", "Open hero event streams", [({}, stats["subscribers"])]
+    yield "hero_events_delivered_total", "counter", "Hero events dispatched to the streams", [({}, stats["delivered"])]
+
@@ -0,0 +1,99 @@
+import hashlib
+import io
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+from uuid import UUID
+from PIL import Image, ImageOps
+from app.core.cache import invalidate_hero_cache
+from app.core.config import settings
+from app.services.jobs import JobContext, register
+
+logger = logging.getLogger(__name__)
+
+# Longest side, in pixels, of each derivative
+VARIANT_SIZES = {
+    "thumb": 160,
+    "card": 480,
+    "detail": 1200,
+}
+VARIANT_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+VARIANTS_SUBDIR = "variants"
+
+def _encode(image: Image.Image, options: dict) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(source: str, output_dir: str) -> Dict[str, Dict[str, str]]:
+    """Resize `source` into every variant/format pair and store them by content hash.
+
+    Runs in a worker process. Returns {variant: {format: filename}}.
+    """
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(source) as original:
+        original.seek(0)
+        base = ImageOps.exif_transpose(original)
+        has_alpha = base.mode in ("RGBA", "LA") or "transparency" in base.info
+        base = base.convert("RGBA" if has_alpha else "RGB")
+    # Drop EXIF, ICC, comments... so that nothing from the upload leaks into derivatives
+    base.info = {}
+
+    variants: Dict[str, Dict[str, str]] = {}
+    for name, size in VARIANT_SIZES.items():
+        resized = base.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants[name] = {}
+        for fmt, options in VARIANT_FORMATS.items():
+            image = resized
+            if fmt == "jpeg" and image.mode == "RGBA":
+                image = Image.new("RGB", image.size, (255, 255, 255))
+                image.paste(resized, mask=resized.getchannel("A"))
+            data = _encode(image, options)
+            filename = f"{hashlib.sha256(data).hexdigest()[:24]}.{fmt}"
+            target = output / filename
+            if not target.exists():
+                tmp = target.with_suffix(target.suffix + ".tmp")
+                tmp.write_bytes(data)
+                tmp.replace(target)
+            variants[name][fmt] = filename
+    return variants
+
+
+@register("hero_image")
+async def process_hero_image(job: JobContext) -> Optional[dict]:
+    """Job queued by an upload: build derivatives and attach them to the hero.
+
+    Payload: hero_id, profile_picture (the URL the derivatives belong to) and
+    source, the path of the stored upload.
+    """
+    # Imported here so that worker processes never build database engines
+    from app.db.session import db_session
+    from app.models.hero import Hero
+    from app.services.events import hero_events
+
+    hero_id = UUID(job.payload["hero_id"])
+    output_dir = Path(settings.upload_dir) / VARIANTS_SUBDIR
+    variants = await job.run_in_process(generate_variants, job.payload["source"], str(output_dir))
+    await job.set_progress(0.9)
+
+    urls = {
+        name: {fmt: f"/uploads/{VARIANTS_SUBDIR}/{filename}" for fmt, filename in formats.items()}
+        for name, formats in variants.items()
+    }
+    async with db_session() as db:
+        hero = await db.get(Hero, hero_id)
+        # Skip if the hero was deleted or got a newer picture in the meantime
+        if hero is None or hero.profile_picture != job.payload["profile_picture"]:
+            return None
+        hero.profile_picture_variants = urls
+        await db.commit()
+    invalidate_hero_cache(hero_id)
+    await hero_events.publish("image", hero_id)
+    return {"variants": urls}
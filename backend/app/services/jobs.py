@@ -0,0 +1,266 @@
+import asyncio
+import functools
+import logging
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from uuid import UUID, uuid4
+from sqlalchemy import and_, case, insert, or_, select, update
+from app.core.config import settings
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Longest error message kept on the job
+MAX_ERROR_LENGTH = 2000
+LEASE_EXPIRED_ERROR = "Lease expired: the worker running the last attempt stopped"
+
+
+@dataclass
+class JobKind:
+    handler: Callable[["JobContext"], Awaitable[Optional[dict]]]
+    max_attempts: int
+
+
+kinds: Dict[str, JobKind] = {}
+
+
+def register(kind: str, max_attempts: int = 3):
+    """Declare the coroutine that runs the jobs of `kind`; it returns the job result, or None."""
+    def decorator(handler):
+        kinds[kind] = JobKind(handler, max_attempts)
+        return handler
+    return decorator
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff(attempt: int) -> timedelta:
+    """Delay before retrying a job whose attempt number `attempt` failed: doubling, jittered."""
+    delay = min(settings.job_retry_base_seconds * 2 ** (attempt - 1), settings.job_retry_max_seconds)
+    return timedelta(seconds=random.uniform(delay / 2, delay))
+
+
+def describe(error: BaseException) -> str:
+    return f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH]
+
+
+class JobContext:
+    """What a job handler gets: its payload, progress reporting and the worker pools."""
+
+    def __init__(self, runner: "JobRunner", job_id: UUID, payload: Dict[str, Any], attempt: int):
+        self.runner = runner
+        self.id = job_id
+        self.payload = payload
+        self.attempt = attempt
+
+    async def set_progress(self, progress: float) -> None:
+        await self.runner.update(self.id, progress=min(max(progress, 0.0), 1.0))
+
+    async def run_in_thread(self, fn: Callable, *args) -> Any:
+        """Blocking I/O, off the event loop that serves requests."""
+        return await asyncio.get_running_loop().run_in_executor(self.runner.thread_pool(), functools.partial(fn, *args))
+
+    async def run_in_process(self, fn: Callable, *args) -> Any:
+        """CPU-bound work; `fn` and its arguments must be picklable."""
+        return await asyncio.get_running_loop().run_in_executor(self.runner.process_pool(), functools.partial(fn, *args))
+
+
+class JobRunner:
+    """Runs the jobs of the `jobs` table in this process, after the responses that queued them.
+
+    Every worker process runs `job_workers` jobs at a time. A job is claimed
+    with FOR UPDATE SKIP LOCKED and holds a lease that its runner renews; a
+    job whose process died is claimed again once the lease runs out, or
+    failed if that was its last attempt. Failed attempts are retried with
+    exponential backoff until `max_attempts`.
+    The database is imported lazily, so that the process pool workers, which
+    import the handler modules, never build engines.
+    """
+
+    def __init__(self):
+        self._workers: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self.running = 0
+        self.outcomes: Counter = Counter()
+
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=settings.job_thread_workers, thread_name_prefix="job")
+        return self._threads
+
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=settings.image_workers)
+        return self._processes
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any]) -> UUID:
+        """Queue a job in its own transaction and wake a local worker; returns its id."""
+        from app.db.session import db_session
+
+        job_id = uuid4()
+        async with db_session() as db:
+            await db.execute(insert(Job).values(
+                id=job_id, kind=kind, status="queued", payload=payload, progress=0.0, attempts=0,
+                max_attempts=kinds[kind].max_attempts, run_after=utcnow(),
+            ))
+            await db.commit()
+        self.wake()
+        return job_id
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def update(self, job_id: UUID, **values) -> None:
+        from app.db.session import db_session
+
+        async with db_session() as db:
+            await db.execute(update(Job).where(Job.id == job_id).values(**values).execution_options(synchronize_session=False))
+            await db.commit()
+
+    async def claim(self):
+        """Take the next due job, or a running one whose lease expired, in a single UPDATE.
+
+        A job whose lease expired during its last attempt is marked failed
+        instead, so that a job crashing its worker is not retried forever.
+        """
+        from app.db.session import db_session
+
+        now = utcnow()
+        exhausted = and_(Job.status == "running", Job.attempts >= Job.max_attempts)
+        due = (
+            select(Job.id)
+            .where(or_(
+                and_(Job.status == "queued", Job.run_after <= now),
+                and_(Job.status == "running", Job.locked_until < now),
+            ))
+            .order_by(Job.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        statement = (
+            update(Job).where(Job.id == due)
+            .values(
+                status=case((exhausted, "failed"), else_="running"),
+                attempts=case((exhausted, Job.attempts), else_=Job.attempts + 1),
+                started_at=case((exhausted, Job.started_at), else_=now),
+                locked_until=case((exhausted, None), else_=now + timedelta(seconds=settings.job_lease_seconds)),
+                finished_at=case((exhausted, now), else_=Job.finished_at),
+                error=case((exhausted, LEASE_EXPIRED_ERROR), else_=Job.error),
+            )
+            .returning(Job.id, Job.kind, Job.status, Job.payload, Job.attempts, Job.max_attempts)
+            .execution_options(synchronize_session=False)
+        )
+        async with db_session() as db:
+            result = await db.execute(statement)
+            job = result.first()
+            await db.commit()
+        return job
+
+    async def renew_lease(self, job_id: UUID) -> None:
+        while True:
+            await asyncio.sleep(settings.job_lease_seconds / 3)
+            try:
+                await self.update(job_id, locked_until=utcnow() + timedelta(seconds=settings.job_lease_seconds))
+            except Exception:
+                logger.warning("Could not renew the lease of job %s", job_id, exc_info=True)
+
+    async def run(self, job) -> None:
+        kind = kinds.get(job.kind)
+        if kind is None:
+            await self.update(job.id, status="failed", error=f"Unknown job kind: {job.kind}", locked_until=None, finished_at=utcnow())
+            return
+
+        self.running += 1
+        lease = asyncio.create_task(self.renew_lease(job.id))
+        try:
+            result = await kind.handler(JobContext(self, job.id, job.payload, job.attempts))
+        except asyncio.CancelledError:
+            # Past the shutdown timeout: handed back, without using up an attempt
+            await self.update(job.id, status="queued", attempts=job.attempts - 1, run_after=utcnow(), locked_until=None)
+            raise
+        except Exception as error:
+            if job.attempts < job.max_attempts:
+                logger.warning("Job %s (%s) failed, attempt %d of %d", job.id, job.kind, job.attempts, job.max_attempts, exc_info=True)
+                self.outcomes[job.kind, "retried"] += 1
+                await self.update(
+                    job.id, status="queued", error=describe(error), locked_until=None,
+                    run_after=utcnow() + backoff(job.attempts),
+                )
+            else:
+                logger.exception("Job %s (%s) failed for good after %d attempts", job.id, job.kind, job.attempts)
+                self.outcomes[job.kind, "failed"] += 1
+                await self.update(job.id, status="failed", error=describe(error), locked_until=None, finished_at=utcnow())
+        else:
+            self.outcomes[job.kind, "succeeded"] += 1
+            await self.update(job.id, status="succeeded", result=result, progress=1.0, locked_until=None, finished_at=utcnow())
+        finally:
+            lease.cancel()
+            self.running -= 1
+
+    async def work(self) -> None:
+        while not self._stopping:
+            try:
+                job = await self.claim()
+            except Exception:
+                logger.warning("Could not claim a job", exc_info=True)
+                job = None
+            if job is not None and job.status == "failed":
+                logger.error("Job %s (%s) failed for good: %s", job.id, job.kind, LEASE_EXPIRED_ERROR)
+                self.outcomes[job.kind, "failed"] += 1
+                continue
+            if job is not None:
+                await self.run(job)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.job_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if not settings.jobs_enabled or self._workers:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        for _ in range(settings.job_workers):
+            self._workers.add(asyncio.create_task(self.work()))
+
+    async def stop(self) -> None:
+        """Let the running jobs finish for up to `job_shutdown_timeout_seconds`, then requeue them."""
+        self._stopping = True
+        self.wake()
+        if self._workers:
+            _, pending = await asyncio.wait(self._workers, timeout=settings.job_shutdown_timeout_seconds)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            self._workers.clear()
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
+    def stats(self) -> dict:
+        return {"workers": len(self._workers), "running": self.running}
+
+
+job_runner = JobRunner()
+
+
+def job_metrics():
+    """Job runner gauges and counters in the shape of app.core.metrics collectors."""
+    yield "jobs_running", "gauge", "Jobs running in this process", [({}, job_runner.running)]
+    yield "jobs_finished_total", "counter", "Job attempts by kind and outcome", [
+        ({"kind": kind, "outcome": outcome}, count) for (kind, outcome), count in job_runner.outcomes.items()
+    ]
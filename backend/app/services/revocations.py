@@ -0,0 +1,41 @@
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import revoke_token, token_cache
+from app.models.revoked_token import RevokedToken
+from app.services.events import hero_events
+
+logger = logging.getLogger(__name__)
+
+
+async def revoke(db: AsyncSession, token: str) -> None:
+    """Refuse `token` in every worker until it expires.
+
+    Stored for the workers that start later, announced with NOTIFY to the
+    running ones, which add it to their token cache.
+    """
+    revoked = revoke_token(token)
+    if revoked is None:
+        return
+    digest, expires_at = revoked
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc)))
+    await db.merge(RevokedToken(digest=digest, expires_at=datetime.fromtimestamp(expires_at, timezone.utc)))
+    await db.commit()
+    await hero_events.announce_revocation(digest, expires_at)
+
+
+async def load_revocations() -> None:
+    """Revocations made before this worker started, read once at startup."""
+    from app.db.session import db_session
+
+    try:
+        async with db_session() as db:
+            result = await db.execute(
+                select(RevokedToken.digest, RevokedToken.expires_at)
+                .where(RevokedToken.expires_at > datetime.now(timezone.utc))
+            )
+            for digest, expires_at in result:
+                token_cache.revoke(digest, expires_at.timestamp())
+    except Exception:
+        logger.warning("Could not load the revoked tokens", exc_info=True)
@@ -0,0 +1,36 @@
+from typing import List, Literal, Tuple
+import numpy as np
+from app.services.teams import SkillSnapshot
+
+Metric = Literal["cosine", "euclidean"]
+
+
+def nearest_heroes(snapshot: SkillSnapshot, row: int, k: int, metric: Metric) -> List[Tuple[int, float]]:
+    """The `k` heroes closest to the one at `row`, best first, as (row, score) pairs.
+
+    Vectors span every skill name known, 0 where a hero lacks it, and are
+    normalized, so both metrics compare skill profiles whatever their overall
+    level; heroes without numeric skills are left out. With "cosine" the score
+    is the similarity, 1 for the same proportions; with "euclidean" it is the
+    distance between the normalized vectors, 0 for the same proportions.
+    The normalized rows come from the snapshot, kept up to date by the matrix.
+    """
+    unit, norms = snapshot.unit, snapshot.norms
+    if norms[row] == 0:
+        return []
+    similarity = np.clip(unit @ unit[row], -1.0, 1.0)
+    if metric == "cosine":
+        scores = similarity
+        keys = -scores
+    else:
+        # |u - v|² = 2 - 2 u·v for vectors of length 1: no heroes x skills temporary
+        scores = np.sqrt(2.0 - 2.0 * similarity)
+        keys = scores
+    candidates = norms > 0
+    candidates[row] = False
+
+    positions = np.flatnonzero(candidates)
+    if len(positions) > k:
+        positions = positions[np.argpartition(keys[positions], k - 1)[:k]]
+    positions = positions[np.argsort(keys[positions], kind="stable")]
+    return [(int(position), float(scores[position])) for position in positions]
@@ -0,0 +1,378 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID, uuid4
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.hero import Hero
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CAPACITY = 256
+
+
+def numeric_levels(skills: Optional[dict]) -> Dict[str, float]:
+    """Skill levels that can be scored; the same rule as the avg_skill column."""
+    return {
+        name: float(level)
+        for name, level in (skills or {}).items()
+        if isinstance(level, (int, float)) and not isinstance(level, bool)
+    }
+
+
+def unit_rows(levels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows scaled to length 1 (left at 0 for heroes without skills), and their former lengths."""
+    norms = np.linalg.norm(levels, axis=1).astype(np.float32)
+    unit = np.divide(levels, norms[:, None], out=np.zeros(levels.shape, dtype=np.float32), where=norms[:, None] > 0)
+    return unit, norms
+
+
+@dataclass
+class SkillSnapshot:
+    """Read-only view of the matrix, safe to search outside the refresh lock.
+
+    The arrays are not copied: the matrix copies them before its next change
+    while a snapshot still holds them.
+    """
+    ids: List[UUID]
+    nicknames: List[str]
+    skills: Dict[str, int]
+    levels: np.ndarray  # heroes x skills, 0 where a hero lacks the skill
+    counts: np.ndarray  # number of numeric skills per hero
+    unit: np.ndarray  # levels scaled to length 1, for the similarity searches
+    norms: np.ndarray  # length of each row of levels, 0 for a hero without skills
+
+
+class SkillMatrix:
+    """Skill levels of every hero as a dense float matrix, kept in memory.
+
+    The first use loads every hero. Afterwards only the heroes reported through
+    mark_dirty() are read again, and their rows are replaced, appended or
+    removed in place. A full reload happens every `max_age` seconds, which
+    covers writes made by other processes.
+
+    With a `path`, every reload from the database is saved there, and a
+    starting process maps the saved levels (copy-on-write) instead of reading
+    every hero, as long as they are less than `max_age` seconds old: the
+    workers of a host share those pages until they change a row. Snapshots
+    are read-only views, so serving requests copies nothing either. The
+    normalized rows are kept alongside the levels and updated with them.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.lock = asyncio.Lock()
+        self.path = Path(path) if path else None
+        self.clear()
+
+    def clear(self) -> None:
+        self.ids: List[UUID] = []
+        self.nicknames: List[str] = []
+        self.rows: Dict[UUID, int] = {}
+        self.skills: Dict[str, int] = {}
+        self.levels = np.zeros((INITIAL_CAPACITY, 0), dtype=np.float32)
+        self.counts = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.unit = np.zeros((INITIAL_CAPACITY, 0), dtype=np.float32)
+        self.norms = np.zeros(INITIAL_CAPACITY, dtype=np.float32)
+        self.loaded_at: Optional[float] = None
+        self.dirty: Set[UUID] = set()
+        self.forget_snapshot()
+
+    def forget_snapshot(self) -> None:
+        self.published: Optional[SkillSnapshot] = None
+        # The arrays handed out with it, which a change must leave alone while they live
+        self.views: List[weakref.ref] = []
+
+    def writable(self) -> None:
+        """Called before changing the arrays in place: copies them if a snapshot still reads them."""
+        self.published = None
+        if any(view() is not None for view in self.views):
+            self.levels, self.counts = self.levels.copy(), self.counts.copy()
+            self.unit, self.norms = self.unit.copy(), self.norms.copy()
+        self.views = []
+
+    def mark_dirty(self, *hero_ids: UUID) -> None:
+        self.dirty.update(hero_ids)
+
+    async def snapshot(self, db: AsyncSession, max_age: float) -> SkillSnapshot:
+        async with self.lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > max_age:
+                await self.reload(db, max_age)
+            if self.dirty:
+                await self.refresh(db)
+            if self.published is None:
+                size = len(self.ids)
+                arrays = [self.levels[:size], self.counts[:size], self.unit[:size], self.norms[:size]]
+                for array in arrays:
+                    array.flags.writeable = False
+                self.published = SkillSnapshot(list(self.ids), list(self.nicknames), dict(self.skills), *arrays)
+                self.views = [weakref.ref(array) for array in arrays]
+            return self.published
+
+    async def reload(self, db: AsyncSession, max_age: float) -> None:
+        # Only on the first load: later ones would undo the refreshes made since the file was saved
+        if self.path is not None and self.loaded_at is None and await asyncio.to_thread(self.load, self.path, max_age):
+            return
+        self.clear()
+        result = await db.execute(select(Hero.id, Hero.nickname, Hero.skills))
+        for hero_id, nickname, skills in result:
+            self.put(hero_id, nickname, numeric_levels(skills))
+        self.loaded_at = time.monotonic()
+        if self.path is not None:
+            try:
+                await asyncio.to_thread(self.save, self.path)
+            except OSError:
+                logger.warning("Could not save the skill matrix to %s", self.path, exc_info=True)
+
+    def save(self, path: Path) -> None:
+        """Levels to a new .npy file, then the rest to `path` as JSON, naming that file.
+
+        Each file is written aside and renamed, so a reader sees either the
+        previous matrix or this one. The .npy files older than the one the
+        saved matrix names are removed, whichever worker saved it last; the
+        processes that mapped them keep their pages.
+        """
+        size = len(self.ids)
+        tag = uuid4().hex[:12]
+        levels_path = path.with_name(f"{path.name}.{tag}.npy")
+        with open(f"{levels_path}.tmp", "wb") as file:
+            np.save(file, self.levels[:size])
+        os.replace(f"{levels_path}.tmp", levels_path)
+        meta = {
+            "levels": levels_path.name,
+            "ids": [str(hero_id) for hero_id in self.ids],
+            "nicknames": self.nicknames,
+            "skills": self.skills,
+            "counts": self.counts[:size].tolist(),
+        }
+        Path(f"{path}.{tag}.tmp").write_text(json.dumps(meta))
+        os.replace(f"{path}.{tag}.tmp", path)
+        # Another worker may have saved since: files newer than the named one can be in use
+        try:
+            current = path.with_name(json.loads(path.read_text())["levels"])
+            saved_at = current.stat().st_mtime
+        except (OSError, ValueError, KeyError):
+            return
+        for old in path.parent.glob(f"{path.name}.*.npy"):
+            try:
+                if old != current and old.stat().st_mtime < saved_at:
+                    old.unlink()
+            except FileNotFoundError:
+                pass
+
+    def load(self, path: Path, max_age: float) -> bool:
+        """Map the matrix saved by save(), unless it is missing, empty or older than `max_age`."""
+        try:
+            age = time.time() - path.stat().st_mtime
+            if age > max_age:
+                return False
+            meta = json.loads(path.read_text())
+            if not meta["ids"]:
+                return False
+            levels = np.load(path.with_name(meta["levels"]), mmap_mode="c")
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError):
+            logger.warning("Could not load the skill matrix from %s", path, exc_info=True)
+            return False
+        if levels.shape != (len(meta["ids"]), len(meta["skills"])):
+            return False
+        # Heroes marked dirty before the first load stay so, and are read again
+        self.forget_snapshot()
+        self.ids = [UUID(hero_id) for hero_id in meta["ids"]]
+        self.nicknames = meta["nicknames"]
+        self.rows = {hero_id: row for row, hero_id in enumerate(self.ids)}
+        self.skills = meta["skills"]
+        self.levels = levels
+        self.counts = np.array(meta["counts"], dtype=np.int32)
+        self.unit, self.norms = unit_rows(levels)
+        # The next full reload comes when the saved matrix is `max_age` old
+        self.loaded_at = time.monotonic() - age
+        return True
+
+    async def refresh(self, db: AsyncSession) -> None:
+        dirty, self.dirty = self.dirty, set()
+        result = await db.execute(select(Hero.id, Hero.nickname, Hero.skills).where(Hero.id.in_(dirty)))
+        found = set()
+        for hero_id, nickname, skills in result:
+            self.put(hero_id, nickname, numeric_levels(skills))
+            found.add(hero_id)
+        for hero_id in dirty - found:
+            self.remove(hero_id)
+
+    def put(self, hero_id: UUID, nickname: str, levels: Dict[str, float]) -> None:
+        self.writable()
+        for name in levels:
+            if name not in self.skills:
+                self.skills[name] = len(self.skills)
+        if len(self.skills) > self.levels.shape[1]:
+            self.levels = np.pad(self.levels, ((0, 0), (0, len(self.skills) - self.levels.shape[1])))
+            self.unit = np.pad(self.unit, ((0, 0), (0, len(self.skills) - self.unit.shape[1])))
+
+        row = self.rows.get(hero_id)
+        if row is None:
+            row = len(self.ids)
+            if row == self.levels.shape[0]:
+                self.levels = np.concatenate([self.levels, np.zeros_like(self.levels)])
+                self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+                self.unit = np.concatenate([self.unit, np.zeros_like(self.unit)])
+                self.norms = np.concatenate([self.norms, np.zeros_like(self.norms)])
+            self.ids.append(hero_id)
+            self.nicknames.append(nickname)
+            self.rows[hero_id] = row
+        else:
+            self.nicknames[row] = nickname
+
+        self.levels[row] = 0
+        for name, level in levels.items():
+            self.levels[row, self.skills[name]] = level
+        self.counts[row] = len(levels)
+        self.norms[row] = np.linalg.norm(self.levels[row])
+        self.unit[row] = self.levels[row] / self.norms[row] if self.norms[row] > 0 else 0
+
+    def remove(self, hero_id: UUID) -> None:
+        row = self.rows.pop(hero_id, None)
+        if row is None:
+            return
+        self.writable()
+        # The last row takes the place of the removed one
+        last = len(self.ids) - 1
+        if row != last:
+            moved = self.ids[last]
+            self.ids[row], self.nicknames[row] = moved, self.nicknames[last]
+            self.levels[row], self.counts[row] = self.levels[last], self.counts[last]
+            self.unit[row], self.norms[row] = self.unit[last], self.norms[last]
+            self.rows[moved] = row
+        self.ids.pop()
+        self.nicknames.pop()
+
+
+skill_matrix = SkillMatrix(settings.skill_matrix_path)
+
+
+def mark_heroes_changed(*hero_ids: UUID) -> None:
+    skill_matrix.mark_dirty(*hero_ids)
+
+
+@dataclass
+class TeamSearch:
+    teams: List[Tuple[float, Tuple[int, ...]]] = field(default_factory=list)
+    candidates: int = 0
+    explored: int = 0
+    exhaustive: bool = True
+
+
+def hero_scores(snapshot: SkillSnapshot, weights: Dict[str, float]) -> np.ndarray:
+    """Score of each hero: weighted sum of its levels, or its average level without weights."""
+    if not weights:
+        totals = snapshot.levels.sum(axis=1, dtype=np.float64)
+        return np.divide(totals, snapshot.counts, out=np.zeros_like(totals), where=snapshot.counts > 0)
+    vector = np.zeros(len(snapshot.skills))
+    for name, weight in weights.items():
+        if name in snapshot.skills:
+            vector[snapshot.skills[name]] = weight
+    return snapshot.levels.astype(np.float64) @ vector
+
+
+def coverage_columns(snapshot: SkillSnapshot, min_coverage: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Levels of the covered skills (heroes x covered skills) and the level each one needs."""
+    levels = np.zeros((len(snapshot.ids), len(min_coverage)))
+    for column, name in enumerate(min_coverage):
+        if name in snapshot.skills:
+            levels[:, column] = snapshot.levels[:, snapshot.skills[name]]
+    return levels, np.array(list(min_coverage.values()), dtype=np.float64)
+
+
+def search_teams(
+    scores: np.ndarray,
+    coverage: np.ndarray,
+    needed: np.ndarray,
+    required: Sequence[int],
+    excluded: Iterable[int],
+    size: int,
+    top_k: int,
+    max_nodes: int,
+) -> TeamSearch:
+    """Best `top_k` teams of `size` heroes by total score, by branch and bound.
+
+    Candidates are tried by decreasing score, so the best score reachable from
+    a branch is a prefix sum and the loop stops at the first branch that cannot
+    beat the current k-th team. Branches that can no longer reach the coverage
+    levels are cut the same way, and the last slot is scored for every
+    remaining candidate at once.
+    """
+    outcome = TeamSearch()
+    fixed = set(required) | set(excluded)
+    pool = np.array([i for i in range(len(scores)) if i not in fixed], dtype=np.int64)
+    pool = pool[np.argsort(-scores[pool], kind="stable")]
+    outcome.candidates = len(pool)
+    slots = size - len(required)
+    if slots < 0 or slots > len(pool):
+        return outcome
+
+    pool_scores = scores[pool]
+    pool_coverage = coverage[pool]
+    # Best sum of r candidates from position i on: prefix[i + r] - prefix[i]
+    prefix = np.concatenate([[0.0], np.cumsum(pool_scores)])
+    # Best level still available from position i on, for every covered skill
+    reachable = np.vstack([
+        np.maximum.accumulate(pool_coverage[::-1])[::-1],
+        np.full((1, coverage.shape[1]), -np.inf),
+    ])
+
+    base_score = float(scores[list(required)].sum())
+    base_coverage = coverage[list(required)].max(axis=0) if required else np.full(coverage.shape[1], -np.inf)
+    heap: List[Tuple[float, Tuple[int, ...]]] = []
+
+    def keep(score: float, team: Tuple[int, ...]) -> None:
+        if len(heap) < top_k:
+            heapq.heappush(heap, (score, team))
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, (score, team))
+
+    def threshold() -> float:
+        return heap[0][0] if len(heap) == top_k else -np.inf
+
+    def extend(start: int, team: Tuple[int, ...], score: float, covered: np.ndarray) -> None:
+        remaining = slots - len(team)
+        if remaining == 0:
+            if (covered >= needed).all():
+                keep(score, team)
+            return
+        if remaining == 1:
+            totals = score + pool_scores[start:]
+            valid = (np.maximum(covered, pool_coverage[start:]) >= needed).all(axis=1) & (totals > threshold())
+            positions = np.flatnonzero(valid)
+            if len(positions) > top_k:
+                positions = positions[np.argpartition(-totals[positions], top_k - 1)[:top_k]]
+            outcome.explored += len(positions)
+            for position in positions:
+                keep(float(totals[position]), team + (start + int(position),))
+            return
+        for i in range(start, len(pool) - remaining + 1):
+            if score + prefix[i + remaining] - prefix[i] <= threshold():
+                break
+            if not (np.maximum(covered, reachable[i]) >= needed).all():
+                break
+            outcome.explored += 1
+            if outcome.explored > max_nodes:
+                outcome.exhaustive = False
+                return
+            extend(i + 1, team + (i,), score + pool_scores[i], np.maximum(covered, pool_coverage[i]))
+            if not outcome.exhaustive:
+                return
+
+    extend(0, (), base_score, base_coverage)
+    outcome.teams = [
+        (score, tuple(required) + tuple(int(pool[i]) for i in team))
+        for score, team in sorted(heap, key=lambda item: -item[0])
+    ]
+    return outcome
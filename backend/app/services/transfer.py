@@ -0,0 +1,88 @@
+import zlib
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import and_, func, not_, select, true
+from app.core.serialization import dumps
+from app.db.patterns import substring_pattern
+from app.db.session import db_session
+from app.models.hero import Hero
+from app.schemas.hero import Hero as HeroSchema, HeroImportProgress
+from app.services.changes import Position, changed_since
+
+EXPORT_FIELDS = tuple(HeroSchema.model_fields)
+MAX_TRACKED_IMPORTS = 100
+
+# Progress of recent imports in this process, oldest first
+import_progress: "OrderedDict[str, HeroImportProgress]" = OrderedDict()
+
+
+def export_filters(exclude_keywords: List[str], min_description_length: int, since: Optional[Position] = None):
+    """Server-side version of the test-hero rules of database/generate_curl_commands.py.
+
+    With `since`, only the heroes written after that change token are exported.
+    """
+    conditions = [
+        not_(Hero.nickname.ilike(substring_pattern(keyword), escape="\\"))
+        for keyword in exclude_keywords if keyword
+    ]
+    if min_description_length:
+        conditions.append(func.length(Hero.description) >= min_description_length)
+    if since is not None:
+        conditions.append(changed_since(since))
+    return and_(true(), *conditions)
+
+
+async def export_ndjson(filters, gzip: bool, batch_size: int) -> AsyncIterator[bytes]:
+    """Yield heroes as NDJSON from a server-side cursor, one partition at a time.
+
+    Runs after the request dependencies are closed, so it opens its own session.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    columns = [getattr(Hero, f) for f in EXPORT_FIELDS]
+    query = (
+        select(*columns)
+        .where(filters)
+        .order_by(Hero.created_at, Hero.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async with db_session() as db:
+        result = await db.stream(query)
+        async for partition in result.partitions(batch_size):
+            chunk = b"".join(dumps(row._asdict()) + b"\n" for row in partition)
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    if compressor:
+        yield compressor.flush()
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], gzip: bool) -> AsyncIterator[bytes]:
+    """Split a (possibly gzipped) byte stream into non-empty lines as it arrives."""
+    decompressor = zlib.decompressobj(wbits=47) if gzip else None
+    pending = b""
+    async for chunk in chunks:
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if decompressor:
+        pending += decompressor.flush()
+    for line in pending.split(b"\n"):
+        if line.strip():
+            yield line
+
+
+def start_import(import_id: str) -> HeroImportProgress:
+    progress = HeroImportProgress(import_id=import_id, status="running")
+    import_progress[import_id] = progress
+    import_progress.move_to_end(import_id)
+    while len(import_progress) > MAX_TRACKED_IMPORTS:
+        import_progress.popitem(last=False)
+    return progress
+
+
+def get_import(import_id: str) -> Optional[HeroImportProgress]:
+    return import_progress.get(import_id)
@@ -0,0 +1,110 @@
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+from uuid import uuid4
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+from app.core.metrics import record_upload
+
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 12
+# Uploads (sha256) and image variants (its first 24 digits) are named after their content
+CONTENT_HASHED = re.compile(r"^([0-9a-f]{24}|[0-9a-f]{64})\.[a-z0-9]+$")
+
+
+def sniff_image_type(header: bytes) -> Optional[Tuple[str, str]]:
+    """Return (content type, extension) from the magic bytes of an image, if supported."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", "jpg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png", "png"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif", "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+def upload_path(directory: Path, name: str) -> Optional[Path]:
+    """Resolve a requested upload name inside `directory`, or None if it points elsewhere.
+
+    Hidden entries (the .upload-*.tmp files being written) and the .tmp files
+    of image variants are never served.
+    """
+    root = directory.resolve()
+    path = (root / name).resolve()
+    if not path.is_relative_to(root) or path == root:
+        return None
+    relative = path.relative_to(root)
+    if any(part.startswith(".") for part in relative.parts) or path.suffix == ".tmp":
+        return None
+    return path
+
+
+def is_content_hashed(path: Path) -> bool:
+    return CONTENT_HASHED.match(path.name) is not None
+
+
+@dataclass
+class StoredUpload:
+    filename: str
+    path: Path
+    digest: str
+    size: int
+    content_type: str
+    deduplicated: bool
+
+
+def invalid_type() -> HTTPException:
+    return HTTPException(status_code=400, detail="Invalid file type. Only images are allowed.")
+
+
+async def store_upload(file: UploadFile, directory: Path, max_bytes: int) -> StoredUpload:
+    """Stream an uploaded image to `directory` under its content hash.
+
+    The size limit and the magic-byte check are applied as chunks arrive, the
+    file only becomes visible through an atomic rename, and content that is
+    already stored is not written twice.
+    """
+    started = time.perf_counter()
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    tmp_path = directory / f".upload-{uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    header = b""
+    kind = None
+    size = 0
+
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File too large (max {max_bytes} bytes)")
+                if kind is None:
+                    header += chunk[:SNIFF_BYTES - len(header)]
+                    if len(header) >= SNIFF_BYTES:
+                        kind = sniff_image_type(header)
+                        if kind is None:
+                            raise invalid_type()
+                digest.update(chunk)
+                await out.write(chunk)
+
+        kind = kind or sniff_image_type(header)
+        if kind is None:
+            raise invalid_type()
+
+        content_type, extension = kind
+        filename = f"{digest.hexdigest()}.{extension}"
+        target = directory / filename
+        deduplicated = await aiofiles.os.path.exists(target)
+        if not deduplicated:
+            await aiofiles.os.replace(tmp_path, target)
+        record_upload(size, time.perf_counter() - started)
+        return StoredUpload(filename, target, digest.hexdigest(), size, content_type, deduplicated)
+    finally:
+        if await aiofiles.os.path.exists(tmp_path):
+            await aiofiles.os.remove(tmp_path)
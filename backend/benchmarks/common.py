@@ -0,0 +1,51 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import re
+from typing import Dict, Optional, Sequence
+
+COUNT_SUFFIXES = {"": 1, "k": 1_000, "m": 1_000_000}
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def parse_count(value: str) -> int:
+    """Read hero counts written as 10000, 10k or 1M."""
+    match = re.fullmatch(r"(\d+)([kKmM]?)", value.strip())
+    if not match:
+        raise ValueError(f"Invalid count: {value}")
+    return int(match.group(1)) * COUNT_SUFFIXES[match.group(2).lower()]
+
+
+def summarize(latencies: Sequence[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else 0.0,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else 0.0,
+    }
+
+
+def peak_rss_kb(pid: int) -> Optional[int]:
+    """Peak resident memory of a process and its children (Linux), None elsewhere."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+            with open(f"/proc/{current}/task/{current}/children") as children:
+                pending.extend(int(child) for child in children.read().split())
+        except (OSError, StopIteration):
+            if current == pid:
+                return None
+    return total
+
+
+def backend_dir() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
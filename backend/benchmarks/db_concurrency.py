@@ -0,0 +1,128 @@
+"""Compare hero read throughput on the async and the sync database paths.
+
+Run from backend/ against a local, migrated Postgres (DATABASE_URL from .env):
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.db_concurrency --heroes 2000 --requests 4000 --concurrency 1 8 32 128
+
+Each mode runs in its own interpreter because DATABASE_ASYNC is read at import
+time. The response cache is disabled so that every request reaches Postgres.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from benchmarks.common import percentile
+
+BENCH_PREFIX = "bench-"
+
+
+def seed(count):
+    from sqlalchemy import delete, insert, select
+    from app.db.session import engine
+    from app.models.hero import Hero
+
+    with engine.begin() as conn:
+        conn.execute(delete(Hero).where(Hero.nickname.startswith(BENCH_PREFIX)))
+        conn.execute(insert(Hero), [
+            {
+                "firstname": f"Bench{i}",
+                "lastname": "Hero",
+                "nickname": f"{BENCH_PREFIX}{i}",
+                "description": "Héros de benchmark. " * 20,
+                "skills": {"force": i % 5 + 1, "vitesse": (i * 7) % 5 + 1, "intelligence": (i * 3) % 5 + 1},
+            }
+            for i in range(count)
+        ])
+        rows = conn.execute(select(Hero.id).where(Hero.nickname.startswith(BENCH_PREFIX)))
+        return [str(row.id) for row in rows]
+
+
+async def drive(scenario, hero_ids, total, concurrency):
+    import httpx
+    from app.main import app
+
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker(client):
+        for _ in remaining:
+            if scenario == "detail":
+                path = f"/api/heroes/{random.choice(hero_ids)}"
+            else:
+                path = "/api/heroes/?limit=50"
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "throughput": total / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+def run_worker(args):
+    hero_ids = json.loads(os.environ["BENCH_HERO_IDS"])
+    results = [
+        asyncio.run(drive(args.scenario, hero_ids, args.requests, concurrency))
+        for concurrency in args.concurrency
+    ]
+    json.dump(results, sys.stdout)
+
+
+def run_mode(database_async, args, hero_ids):
+    env = dict(
+        os.environ,
+        DATABASE_ASYNC=str(database_async).lower(),
+        RESPONSE_CACHE_MAX_ENTRIES="0",
+        BENCH_HERO_IDS=json.dumps(hero_ids),
+    )
+    command = [
+        sys.executable, "-m", "benchmarks.db_concurrency", "--worker",
+        "--scenario", args.scenario, "--requests", str(args.requests),
+        "--concurrency", *map(str, args.concurrency),
+    ]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heroes", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--scenario", choices=["detail", "list"], default="detail")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    hero_ids = seed(args.heroes)
+    modes = {"async": run_mode(True, args, hero_ids), "sync": run_mode(False, args, hero_ids)}
+
+    print(f"scenario={args.scenario} heroes={args.heroes} requests={args.requests}")
+    print(f"{'conc':>5} | {'async req/s':>11} {'p50 ms':>8} {'p95 ms':>8} | {'sync req/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for a, s in zip(modes["async"], modes["sync"]):
+        print(
+            f"{a['concurrency']:>5} | {a['throughput']:>11.0f} {a['p50_ms']:>8.2f} {a['p95_ms']:>8.2f}"
+            f" | {s['throughput']:>10.0f} {s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
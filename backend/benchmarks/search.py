@@ -0,0 +1,189 @@
+"""Measure GET /api/heroes/search latency on a large synthetic roster.
+
+Run from backend/ against a local Postgres migrated to head (DATABASE_URL from .env):
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.search --heroes 1000000 --queries 1000
+
+Synthetic heroes are generated inside Postgres (generate_series) with a
+recognisable nickname prefix; --reuse skips seeding when they already exist and
+--cleanup removes them afterwards. The response cache is disabled so every
+request reaches the indexes.
+"""
+import os
+
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+
+import argparse
+import asyncio
+import random
+import time
+from sqlalchemy import delete, func, literal_column, or_, select, text
+from sqlalchemy.dialects import postgresql
+from benchmarks.common import percentile
+
+BENCH_PREFIX = "srch-"
+SEED_CHUNK = 100_000
+
+SEED_SQL = text("""
+INSERT INTO heroes (id, firstname, lastname, nickname, description, skills)
+SELECT
+    gen_random_uuid(),
+    (ARRAY['Élodie', 'Amélie', 'François', 'Jérôme', 'Clément', 'Hélène', 'Noémie', 'Loïc'])[1 + g % 8],
+    (ARRAY['Lefèvre', 'Dubois', 'Moreau', 'Girard', 'Bénard', 'Faure', 'Rousseau', 'Mercier'])[1 + (g / 8) % 8],
+    :prefix || (ARRAY['Ombre', 'Éclair', 'Foudre', 'Flamme', 'Tempête', 'Comète', 'Étoile', 'Griffe'])[1 + (g / 64) % 8] || '-' || g,
+    (ARRAY[
+        'Chevalier des brumes, il protège les villages côtiers.',
+        'Elle maîtrise le feu et les éclairs depuis son enfance.',
+        'Voleur repenti, il connaît tous les passages secrets de la cité.',
+        'Guérisseuse itinérante qui soigne les blessés des batailles oubliées.',
+        'Ancien pilote de course devenu gardien des routes de montagne.'
+    ])[1 + g % 5] || ' ' ||
+    (ARRAY[
+        'Son bouclier a été forgé dans un métal tombé du ciel.',
+        'On raconte qu''il a dompté un dragon des glaces.',
+        'Elle parle aux animaux et commande aux tempêtes.',
+        'Ses flèches ne manquent jamais leur cible.',
+        'Il voyage à travers les rêves pour combattre les cauchemars.',
+        'Ses inventions défient les lois de la physique.',
+        'Elle a juré de retrouver la couronne perdue.'
+    ])[1 + g % 7],
+    json_build_object('force', 1 + g % 5, 'vitesse', 1 + (g / 5) % 5, 'intelligence', 1 + (g / 25) % 5)
+FROM generate_series(:start, :stop) AS g
+""")
+
+FULLTEXT_TERMS = [
+    "dragon", "dragons des glaces", "éclairs", "eclair", "tempete", "guérisseuse", "chevalier",
+    "passages secrets", "bouclier forgé", "cauchemars", "pilote montagne", "couronne perdue",
+    "feu -dragon", "\"flèches\"", "inventions physique",
+]
+AUTOCOMPLETE_PREFIXES = ["omb", "ecla", "éclair-1", "foud", "flamm", "tempe", "comete-2", "etoile-9", "griff", "srch-omb"]
+
+
+def seed(count):
+    from app.db.session import engine
+    from app.models.hero import Hero
+
+    with engine.begin() as conn:
+        conn.execute(delete(Hero).where(Hero.nickname.startswith(BENCH_PREFIX)))
+    for start in range(1, count + 1, SEED_CHUNK):
+        stop = min(start + SEED_CHUNK - 1, count)
+        with engine.begin() as conn:
+            conn.execute(SEED_SQL, {"prefix": BENCH_PREFIX, "start": start, "stop": stop})
+        print(f"  seeded {stop}/{count}")
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE heroes"))
+
+
+def count_seeded():
+    from app.db.session import engine
+    from app.models.hero import Hero
+
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).where(Hero.nickname.startswith(BENCH_PREFIX)))
+
+
+def cleanup():
+    from app.db.session import engine
+    from app.models.hero import Hero
+
+    with engine.begin() as conn:
+        conn.execute(delete(Hero).where(Hero.nickname.startswith(BENCH_PREFIX)))
+
+
+def explain(mode, term):
+    """Print the plan of the query the endpoint issues, to check that the GIN index is used."""
+    from app.db.session import engine
+    from app.models.hero import Hero, SEARCH_CONFIG
+
+    if mode == "fulltext":
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), term)
+        query = select(Hero.id).where(Hero.search_vector.op("@@")(ts_query))
+    else:
+        nickname = func.f_unaccent(func.lower(Hero.nickname))
+        query = select(Hero.id).where(or_(
+            nickname.like(func.f_unaccent(func.lower(term)).concat("%")),
+            nickname.op("%")(func.f_unaccent(func.lower(term))),
+        ))
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}")).scalars().all()
+    print(f"\n-- EXPLAIN {mode} {term!r}")
+    print("\n".join(plan))
+
+
+async def drive(mode, terms, total, concurrency, limit):
+    import httpx
+    from app.main import app
+
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker(client):
+        for _ in remaining:
+            params = {"q": random.choice(terms), "mode": mode, "limit": limit, "fields": "id,nickname"}
+            start = time.perf_counter()
+            response = await client.get("/api/heroes/search", params=params)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up connections and caches of the database
+        await client.get("/api/heroes/search", params={"q": terms[0], "mode": mode})
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "throughput": total / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heroes", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--target-p95-ms", type=float, default=10.0)
+    parser.add_argument("--reuse", action="store_true", help="Keep already seeded heroes")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the synthetic heroes at the end")
+    parser.add_argument("--explain", action="store_true", help="Print EXPLAIN ANALYZE of both query shapes")
+    args = parser.parse_args()
+
+    if not (args.reuse and count_seeded() >= args.heroes):
+        print(f"Seeding {args.heroes} heroes...")
+        seed(args.heroes)
+
+    if args.explain:
+        explain("fulltext", FULLTEXT_TERMS[0])
+        explain("autocomplete", AUTOCOMPLETE_PREFIXES[0])
+
+    results = [
+        asyncio.run(drive("fulltext", FULLTEXT_TERMS, args.queries, args.concurrency, args.limit)),
+        asyncio.run(drive("autocomplete", AUTOCOMPLETE_PREFIXES, args.queries, args.concurrency, args.limit)),
+    ]
+
+    print(f"\nheroes={args.heroes} queries={args.queries} concurrency={args.concurrency}")
+    print(f"{'mode':>12} | {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} | target p95 < {args.target_p95_ms} ms")
+    failed = False
+    for r in results:
+        ok = r["p95_ms"] < args.target_p95_ms
+        failed |= not ok
+        print(
+            f"{r['mode']:>12} | {r['throughput']:>7.0f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+            f" | {'PASS' if ok else 'FAIL'}"
+        )
+
+    if args.cleanup:
+        cleanup()
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
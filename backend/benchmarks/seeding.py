@@ -0,0 +1,97 @@
+"""Synthetic heroes for the benchmarks, generated deterministically."""
+import random
+from typing import Dict, Iterator, List
+from sqlalchemy import delete, func, insert, select, text
+
+BENCH_PREFIX = "bench-"
+SKILLS = [
+    "force", "vitesse", "intelligence", "agilité", "endurance",
+    "magie", "charisme", "stratégie", "discrétion", "précision",
+]
+FIRSTNAMES = ["Élodie", "Amélie", "François", "Jérôme", "Clément", "Hélène", "Noémie", "Loïc", "Inès", "Théo"]
+LASTNAMES = ["Lefèvre", "Dubois", "Moreau", "Girard", "Bénard", "Faure", "Rousseau", "Mercier", "Garnier", "Roux"]
+TITLES = ["Ombre", "Éclair", "Foudre", "Flamme", "Tempête", "Comète", "Étoile", "Griffe", "Brume", "Écho"]
+SENTENCES = [
+    "Chevalier des brumes, il protège les villages côtiers.",
+    "Elle maîtrise le feu et les éclairs depuis son enfance.",
+    "Voleur repenti, il connaît tous les passages secrets de la cité.",
+    "Guérisseuse itinérante qui soigne les blessés des batailles oubliées.",
+    "Son bouclier a été forgé dans un métal tombé du ciel.",
+    "On raconte qu'il a dompté un dragon des glaces.",
+    "Ses inventions défient les lois de la physique.",
+]
+# Most heroes are average, a few excel
+LEVEL_WEIGHTS = [10, 25, 35, 20, 10]
+
+
+def synthetic_skills(rng: random.Random) -> Dict[str, int]:
+    names = rng.sample(SKILLS, rng.randint(2, 6))
+    return {name: rng.choices(range(1, 6), LEVEL_WEIGHTS)[0] for name in names}
+
+
+def synthetic_hero(rng: random.Random, index: int, prefix: str = BENCH_PREFIX) -> dict:
+    return {
+        "firstname": rng.choice(FIRSTNAMES),
+        "lastname": rng.choice(LASTNAMES),
+        "nickname": f"{prefix}{rng.choice(TITLES)}-{index}",
+        "description": " ".join(rng.sample(SENTENCES, rng.randint(1, 3))),
+        "skills": synthetic_skills(rng),
+    }
+
+
+def synthetic_heroes(count: int, seed: int = 0, prefix: str = BENCH_PREFIX) -> Iterator[dict]:
+    rng = random.Random(seed)
+    for index in range(count):
+        yield synthetic_hero(rng, index, prefix)
+
+
+def count_seeded(prefix: str = BENCH_PREFIX) -> int:
+    from app.db.session import engine
+    from app.models.hero import Hero
+
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).where(Hero.nickname.startswith(prefix)))
+
+
+def seed(count: int, seed: int = 0, batch_size: int = 10_000, reuse: bool = False) -> int:
+    """Insert `count` synthetic heroes, unless --reuse finds them already there."""
+    from app.db.session import engine
+    from app.models.hero import Hero
+
+    if reuse and count_seeded() == count:
+        return 0
+    cleanup()
+    batch: List[dict] = []
+    for hero in synthetic_heroes(count, seed):
+        batch.append(hero)
+        if len(batch) == batch_size:
+            with engine.begin() as conn:
+                conn.execute(insert(Hero), batch)
+            batch = []
+    if batch:
+        with engine.begin() as conn:
+            conn.execute(insert(Hero), batch)
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE heroes"))
+    return count
+
+
+def sample_ids(limit: int) -> List[str]:
+    """Ids of seeded heroes; uuid4 ids make the id order a random sample."""
+    from app.db.session import engine
+    from app.models.hero import Hero
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(Hero.id).where(Hero.nickname.startswith(BENCH_PREFIX)).order_by(Hero.id).limit(limit)
+        )
+        return [str(row.id) for row in rows]
+
+
+def cleanup(prefix: str = BENCH_PREFIX) -> None:
+    from app.db.session import engine
+    from app.models.hero import Hero
+
+    with engine.begin() as conn:
+        conn.execute(delete(Hero).where(Hero.nickname.startswith(prefix)))
@@ -0,0 +1,111 @@
+"""Compare the ways of turning a page of heroes into JSON bytes.
+
+Run from backend/ (no database needed):
+
+    python -m benchmarks.serialization --rows 10000
+
+"orm + response_model" is what FastAPI does for `response_model=List[Hero]`
+with ORM objects: validate each one into the schema, then encode. The others
+start from column tuples, as the list endpoint does: the previous
+jsonable_encoder + json.dumps encoding, pydantic-core's to_json, and orjson
+(when installed), which app.core.serialization.dumps picks first.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ADMIN_PASSWORD", "benchmark")
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from benchmarks.seeding import synthetic_hero
+
+
+def make_rows(count):
+    from app.api.endpoints.heroes import HERO_FIELDS
+
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        hero = synthetic_hero(rng, i)
+        levels = list(hero["skills"].values())
+        hero.update(
+            id=uuid.UUID(int=rng.getrandbits(128)),
+            profile_picture=f"/uploads/{i:064x}.jpg",
+            profile_picture_variants=None,
+            avg_skill=sum(levels) / len(levels),
+            max_skill=float(max(levels)),
+            created_at=start + timedelta(seconds=i),
+            updated_at=None,
+        )
+        rows.append(tuple(hero[f] for f in HERO_FIELDS))
+    return rows
+
+
+def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from app.api.endpoints.heroes import HERO_FIELDS
+    from app.core.serialization import dumps, orjson
+    from app.models.hero import Hero
+    from app.schemas.hero import Hero as HeroSchema
+
+    rows = make_rows(args.rows)
+    objects = [Hero(**dict(zip(HERO_FIELDS, row))) for row in rows]
+    adapter = TypeAdapter(List[HeroSchema])
+
+    def orm_response_model():
+        models = [HeroSchema.model_validate(obj) for obj in objects]
+        return json.dumps(jsonable_encoder(models), ensure_ascii=False).encode("utf-8")
+
+    def orm_type_adapter():
+        return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+    def tuples_jsonable_encoder():
+        heroes = [dict(zip(HERO_FIELDS, row)) for row in rows]
+        return json.dumps(jsonable_encoder(heroes), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def tuples_pydantic_core():
+        return to_json([dict(zip(HERO_FIELDS, row)) for row in rows])
+
+    def tuples_dumps():
+        return dumps([dict(zip(HERO_FIELDS, row)) for row in rows])
+
+    paths = [
+        ("orm + response_model", orm_response_model),
+        ("orm + TypeAdapter", orm_type_adapter),
+        ("tuples + jsonable_encoder", tuples_jsonable_encoder),
+        ("tuples + pydantic-core", tuples_pydantic_core),
+        (f"tuples + dumps ({'orjson' if orjson else 'pydantic-core'})", tuples_dumps),
+    ]
+    results = [(name, *best_of(function, args.repeat)) for name, function in paths]
+
+    reference = results[0][1]
+    print(f"rows={args.rows} (best of {args.repeat})")
+    for name, ms, size in results:
+        print(f"{name:>34} | {ms:8.1f} ms | {size / 1024:8.0f} KiB | x{reference / ms:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
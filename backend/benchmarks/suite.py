@@ -0,0 +1,285 @@
+"""Load-test the API end to end and compare the results with a saved baseline.
+
+Run from backend/ against a local, migrated database (DATABASE_URL from .env):
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.suite --heroes 10k --concurrency 1 16 64 --save-baseline benchmarks/baselines/10k.json
+    python -m benchmarks.suite --heroes 10k --concurrency 1 16 64 --baseline benchmarks/baselines/10k.json
+
+The database is seeded with synthetic heroes (10k, 100k or 1M, see
+benchmarks/seeding.py), app.main:app is started with uvicorn in a subprocess and
+every scenario is driven over HTTP at each concurrency level. The response
+cache is disabled unless --cache is given. With --baseline, a drop in
+throughput or a rise in p95 beyond --tolerance is reported as a regression
+and the exit status is 1.
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from benchmarks.common import backend_dir, parse_count, peak_rss_kb, summarize
+from benchmarks.seeding import BENCH_PREFIX, synthetic_hero, synthetic_skills
+
+SCENARIOS = ["list", "detail", "create", "update", "delete", "upload"]
+SAMPLE_IDS = 10_000
+
+
+class Scenario:
+    """Builds one request per call; `prepare` runs before the clock starts."""
+
+    def __init__(self, name, client, hero_ids, rng, tag):
+        self.name = name
+        self.client = client
+        self.hero_ids = hero_ids
+        self.rng = rng
+        # Unique per run and concurrency level, for the nicknames of new heroes
+        self.tag = tag
+        self.counter = itertools.count()
+        self.deletable = []
+
+    async def prepare(self, total):
+        if self.name != "delete":
+            return
+        # Heroes made for this scenario, so that the seeded roster stays intact
+        for start in range(0, total, 5000):
+            heroes = [
+                synthetic_hero(self.rng, i, f"{BENCH_PREFIX}del-{self.tag}-")
+                for i in range(start, min(start + 5000, total))
+            ]
+            response = await self.client.post("/api/heroes/bulk", json={"mode": "create", "heroes": heroes})
+            response.raise_for_status()
+            self.deletable += [item["id"] for item in response.json()["items"] if item["status"] == "created"]
+
+    def build(self):
+        """Return the arguments of the next request (method, url, kwargs)."""
+        n = next(self.counter)
+        if self.name == "list":
+            params = {"limit": 50}
+            if n % 3 == 1:
+                params["order_by"] = "avg_skill"
+            elif n % 3 == 2:
+                params["min_avg_skill"] = 3
+            return "GET", "/api/heroes/", {"params": params}
+        if self.name == "detail":
+            return "GET", f"/api/heroes/{self.rng.choice(self.hero_ids)}", {}
+        if self.name == "create":
+            hero = synthetic_hero(self.rng, n, f"{BENCH_PREFIX}new-{self.tag}-")
+            return "POST", "/api/heroes/", {"json": hero}
+        if self.name == "update":
+            body = {"skills": synthetic_skills(self.rng)}
+            return "PUT", f"/api/heroes/{self.rng.choice(self.hero_ids)}", {"json": body}
+        if self.name == "delete":
+            return "DELETE", f"/api/heroes/{self.deletable.pop()}", {}
+        if self.name == "upload":
+            image = make_image(self.tag, n)
+            files = {"file": (f"bench-{n}.jpg", image, "image/jpeg")}
+            return "POST", f"/api/heroes/upload-image/{self.rng.choice(self.hero_ids)}", {"files": files}
+        raise ValueError(self.name)
+
+
+def make_image(tag, n):
+    """A distinct JPEG per request, so that uploads are not deduplicated."""
+    from PIL import Image
+
+    image = Image.new("RGB", (640, 480), (n % 256, (n // 256) % 256, sum(map(ord, tag)) % 256))
+    image.putpixel((0, 0), (n % 251, n % 241, n % 239))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+async def run_scenario(base_url, token, name, hero_ids, total, concurrency, run_id):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        tag = f"{run_id}-{concurrency}"
+        scenario = Scenario(name, client, hero_ids, random.Random(f"{tag}-{name}"), tag)
+        await scenario.prepare(total)
+        latencies, errors = [], 0
+        remaining = iter(range(total))
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                method, url, kwargs = scenario.build()
+                start = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {"scenario": name, "concurrency": concurrency, **summarize(latencies, elapsed, errors)}
+
+
+def start_server(port, workers, cache):
+    env = dict(os.environ)
+    if not cache:
+        env["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=backend_dir(), env=env)
+
+
+def wait_until_ready(base_url, server, timeout=30.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("Server did not start in time")
+
+
+def login(base_url):
+    import httpx
+    from app.core.config import settings
+
+    response = httpx.post(f"{base_url}/api/auth/login", json={"password": settings.admin_password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=backend_dir(), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Pair each result with its baseline and flag the regressions."""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    rows = []
+    for result in results:
+        base = previous.get((result["scenario"], result["concurrency"]))
+        if base is None:
+            rows.append((result, None, []))
+            continue
+        flags = []
+        if base["throughput"] and result["throughput"] < base["throughput"] * (1 - tolerance):
+            flags.append("throughput")
+        if base["p95_ms"] and result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            flags.append("p95")
+        rows.append((result, base, flags))
+    return rows
+
+
+def print_results(report, comparison):
+    print(f"\nheroes={report['heroes']} requests={report['requests']} cache={report['cache']} "
+          f"peak RSS={report['peak_rss_kb'] or 'n/a'} kB")
+    print(f"{'scenario':>8} {'conc':>5} | {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+          + (" | baseline req/s   p95 ms  status" if comparison else ""))
+    rows = comparison or [(r, None, []) for r in report["results"]]
+    for result, base, flags in rows:
+        line = (
+            f"{result['scenario']:>8} {result['concurrency']:>5} | {result['throughput']:>8.0f} "
+            f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>6}"
+        )
+        if comparison:
+            if base is None:
+                line += " |              (no baseline)"
+            else:
+                status = "REGRESSION (" + ", ".join(flags) + ")" if flags else "ok"
+                line += f" | {base['throughput']:>14.0f} {base['p95_ms']:>8.2f}  {status}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heroes", type=parse_count, default="10k", help="10k, 100k, 1M...")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario and concurrency level")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic roster")
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+    parser.add_argument("--reuse", action="store_true", help="Keep already seeded heroes")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the benchmark heroes at the end")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--save-baseline", help="Write the results as the baseline to this JSON file")
+    parser.add_argument("--baseline", help="Compare with this baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative change (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    from benchmarks import seeding
+
+    print(f"Seeding {args.heroes} heroes...")
+    seeding.seed(args.heroes, args.seed, reuse=args.reuse)
+    hero_ids = seeding.sample_ids(SAMPLE_IDS)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    server = start_server(args.port, args.workers, args.cache)
+    try:
+        wait_until_ready(base_url, server)
+        token = login(base_url)
+        results = []
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                print(f"  {name} x{concurrency}...")
+                results.append(asyncio.run(
+                    run_scenario(base_url, token, name, hero_ids, args.requests, concurrency, run_id)
+                ))
+        peak_rss = peak_rss_kb(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "heroes": args.heroes,
+        "requests": args.requests,
+        "workers": args.workers,
+        "cache": args.cache,
+        "peak_rss_kb": peak_rss,
+        "results": results,
+    }
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare(results, json.load(f), args.tolerance)
+    print_results(report, comparison)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.cleanup:
+        seeding.cleanup()
+    if comparison and any(flags for _, _, flags in comparison):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
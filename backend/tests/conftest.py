@@ -0,0 +1,58 @@
+"""Fixtures for the API tests.
+
+They run the application in-process against the database of DATABASE_URL
+(the local, migrated Postgres of .env), from backend/:
+
+    pip install -r tests/requirements.txt
+    python -m pytest
+"""
+import os
+import uuid
+
+# Reads stay on the primary, whose engine assert_max_queries watches
+os.environ["DATABASE_REPLICA_URLS"] = ""
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.db.diagnostics import assert_max_queries
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Not entered as a context manager: without the startup events, no job
+    # runner or event listener issues queries in the background of a test
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    response = client.post("/api/auth/login", json={"password": settings.admin_password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def hero(client, auth_headers):
+    """A hero created for the test, deleted afterwards."""
+    response = client.post("/api/heroes/", headers=auth_headers, json={
+        "firstname": "Test",
+        "lastname": "Budget",
+        "nickname": f"test-budget-{uuid.uuid4().hex[:8]}",
+        "description": "Héros créé par les tests de budget de requêtes.",
+        "skills": {"force": 3, "vitesse": 4},
+    })
+    assert response.status_code == 200, response.text
+    yield response.json()
+    client.delete(f"/api/heroes/{response.json()['id']}", headers=auth_headers)
+
+
+@pytest.fixture
+def max_queries():
+    """assert_max_queries, to wrap the requests of a test::
+
+        def test_detail(client, hero, max_queries):
+            with max_queries(1):
+                client.get(f"/api/heroes/{hero['id']}")
+    """
+    return assert_max_queries
@@ -0,0 +1,42 @@
+"""Delta sync pages and the change horizon."""
+import uuid
+from datetime import datetime
+from app.api.pagination import decode_cursor, encode_cursor
+from app.core.config import settings
+from app.services.changes import NIL_ID
+
+
+def create_heroes(client, auth_headers, count):
+    heroes = []
+    for _ in range(count):
+        response = client.post("/api/heroes/", headers=auth_headers, json={
+            "firstname": "Test",
+            "lastname": "Changes",
+            "nickname": f"test-changes-{uuid.uuid4().hex[:8]}",
+            "description": "Héros créé par les tests de synchronisation incrémentale.",
+        })
+        assert response.status_code == 200, response.text
+        heroes.append(response.json())
+    return heroes
+
+
+def test_a_full_page_stops_at_the_horizon(client, auth_headers, monkeypatch):
+    heroes = create_heroes(client, auth_headers, 3)
+    ids = {hero["id"] for hero in heroes}
+    first_write = min(datetime.fromisoformat(hero["updated_at"]) for hero in heroes)
+    since = encode_cursor(first_write, NIL_ID)
+    try:
+        monkeypatch.setattr(settings, "changes_lag_seconds", 0.0)
+        page = client.get("/api/heroes/changes", params={"since": since, "limit": 2}).json()
+        assert page["has_more"]
+        assert {hero["id"] for hero in page["heroes"]} <= ids
+
+        # The three heroes are now past the horizon: a full page must not hand out their positions
+        monkeypatch.setattr(settings, "changes_lag_seconds", 60.0)
+        page = client.get("/api/heroes/changes", params={"since": since, "limit": 2}).json()
+        assert not ids & {hero["id"] for hero in page["heroes"]}
+        assert not page["has_more"]
+        assert decode_cursor(page["next"]) == (first_write, NIL_ID)
+    finally:
+        for hero in heroes:
+            client.delete(f"/api/heroes/{hero['id']}", headers=auth_headers)
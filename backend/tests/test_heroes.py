@@ -0,0 +1,23 @@
+"""Hero writes."""
+from uuid import UUID
+from sqlalchemy import update
+from app.db.session import SessionLocal
+from app.models.hero import Hero
+
+VARIANTS = {"thumb": {"webp": "/uploads/variants/old.webp", "jpeg": "/uploads/variants/old.jpeg"}}
+
+
+def test_a_new_picture_drops_the_variants_of_the_old_one(client, hero, auth_headers):
+    with SessionLocal() as db:
+        db.execute(update(Hero).where(Hero.id == UUID(hero["id"])).values(
+            profile_picture="/uploads/old.png", profile_picture_variants=VARIANTS,
+        ))
+        db.commit()
+
+    response = client.patch(f"/api/heroes/{hero['id']}", headers=auth_headers, json={"profile_picture": "/uploads/old.png"})
+    assert response.json()["profile_picture_variants"] == VARIANTS
+
+    response = client.put(f"/api/heroes/{hero['id']}", headers=auth_headers, json={"profile_picture": "/uploads/new.png"})
+    assert response.status_code == 200
+    assert response.json()["profile_picture"] == "/uploads/new.png"
+    assert response.json()["profile_picture_variants"] is None
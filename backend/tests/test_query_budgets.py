@@ -0,0 +1,53 @@
+"""SQL statements per request on the hero endpoints; going over usually means an N+1."""
+import pytest
+from app.core.cache import invalidate_hero_cache
+
+
+def test_detail_miss_reads_the_hero_in_one_query(client, hero, max_queries):
+    invalidate_hero_cache(hero["id"])
+    with max_queries(1):
+        response = client.get(f"/api/heroes/{hero['id']}")
+    assert response.status_code == 200
+    assert response.json()["nickname"] == hero["nickname"]
+
+
+def test_cached_detail_runs_no_query(client, hero, max_queries):
+    client.get(f"/api/heroes/{hero['id']}")
+    with max_queries(0):
+        response = client.get(f"/api/heroes/{hero['id']}")
+    assert response.status_code == 200
+
+
+def test_list_page_runs_one_query(client, hero, max_queries):
+    invalidate_hero_cache()
+    with max_queries(1):
+        response = client.get("/api/heroes/", params={"limit": 50})
+    assert response.status_code == 200
+
+
+def test_batch_reads_every_hero_in_one_query(client, hero, auth_headers, max_queries):
+    other = client.post("/api/heroes/", headers=auth_headers, json={
+        **{field: hero[field] for field in ("firstname", "lastname", "description", "skills")},
+        "nickname": f"{hero['nickname']}-2",
+    }).json()
+    try:
+        invalidate_hero_cache(hero["id"], other["id"])
+        with max_queries(1):
+            response = client.get("/api/heroes/batch", params={"ids": f"{hero['id']},{other['id']}"})
+        assert [found["id"] for found in response.json()["heroes"]] == [hero["id"], other["id"]]
+    finally:
+        client.delete(f"/api/heroes/{other['id']}", headers=auth_headers)
+
+
+def test_update_is_a_single_statement(client, hero, auth_headers, max_queries):
+    with max_queries(1):
+        response = client.patch(f"/api/heroes/{hero['id']}", headers=auth_headers, json={"firstname": "Budget"})
+    assert response.status_code == 200
+    assert response.json()["firstname"] == "Budget"
+
+
+def test_going_over_the_budget_fails(client, hero, max_queries):
+    invalidate_hero_cache(hero["id"])
+    with pytest.raises(AssertionError, match="1 queries run, at most 0 expected"):
+        with max_queries(0):
+            client.get(f"/api/heroes/{hero['id']}")
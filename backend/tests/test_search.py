@@ -0,0 +1,21 @@
+"""Hero search: user input is matched literally."""
+import uuid
+
+
+def test_autocomplete_takes_like_wildcards_literally(client, auth_headers):
+    nickname = f"test-search-{uuid.uuid4().hex[:8]}"
+    hero = client.post("/api/heroes/", headers=auth_headers, json={
+        "firstname": "Test",
+        "lastname": "Search",
+        "nickname": nickname,
+        "description": "Héros créé par les tests de recherche.",
+    }).json()
+    try:
+        for q in ("%", "_", f"{nickname[:4]}%"):
+            response = client.get("/api/heroes/search", params={"q": q, "mode": "autocomplete", "limit": 100})
+            assert response.status_code == 200
+            assert hero["id"] not in [hit["id"] for hit in response.json()]
+        response = client.get("/api/heroes/search", params={"q": nickname[:10], "mode": "autocomplete", "limit": 100})
+        assert hero["id"] in [hit["id"] for hit in response.json()]
+    finally:
+        client.delete(f"/api/heroes/{hero['id']}", headers=auth_headers)
@@ -0,0 +1,53 @@
+"""Similar heroes over the normalized rows the skill matrix keeps up to date."""
+import asyncio
+import time
+from uuid import uuid4
+import numpy as np
+import pytest
+from app.services.similar import nearest_heroes
+from app.services.teams import SkillMatrix
+
+
+def snapshot_of(matrix):
+    # Loaded and clean: no database access
+    matrix.loaded_at = time.monotonic()
+    return asyncio.run(matrix.snapshot(None, 300))
+
+
+def test_normalized_rows_follow_puts_and_removes():
+    matrix = SkillMatrix()
+    a, b, c, d = uuid4(), uuid4(), uuid4(), uuid4()
+    matrix.put(a, "a", {"force": 5.0, "vitesse": 1.0})
+    matrix.put(b, "b", {"force": 10.0, "vitesse": 2.0})
+    matrix.put(c, "c", {"force": 1.0, "vitesse": 5.0})
+    matrix.put(d, "d", {})
+    before = snapshot_of(matrix)
+    matrix.remove(a)
+    matrix.put(c, "c", {"magie": 3.0})
+    snapshot = snapshot_of(matrix)
+
+    levels = snapshot.levels.astype(np.float64)
+    norms = np.linalg.norm(levels, axis=1)
+    assert np.allclose(snapshot.norms, norms)
+    assert np.allclose(snapshot.unit[norms > 0], levels[norms > 0] / norms[norms > 0, None])
+    assert not snapshot.unit[norms == 0].any()
+    # The snapshot taken before the changes still reads the old rows
+    assert np.allclose(before.unit[before.ids.index(c)][:2], np.array([1.0, 5.0]) / np.sqrt(26))
+
+
+def test_both_metrics_rank_by_profile():
+    matrix = SkillMatrix()
+    a, b, c, d = uuid4(), uuid4(), uuid4(), uuid4()
+    matrix.put(a, "a", {"force": 5.0, "vitesse": 1.0})
+    matrix.put(b, "b", {"force": 10.0, "vitesse": 2.0})
+    matrix.put(c, "c", {"force": 1.0, "vitesse": 5.0})
+    matrix.put(d, "d", {})
+    snapshot = snapshot_of(matrix)
+    row = snapshot.ids.index(a)
+
+    cosine = nearest_heroes(snapshot, row, 10, "cosine")
+    euclidean = nearest_heroes(snapshot, row, 10, "euclidean")
+    assert [snapshot.ids[position] for position, _ in cosine] == [b, c]
+    assert [snapshot.ids[position] for position, _ in euclidean] == [b, c]
+    assert cosine[0][1] == pytest.approx(1.0) and euclidean[0][1] == pytest.approx(0.0, abs=1e-3)
+    assert nearest_heroes(snapshot, snapshot.ids.index(d), 10, "euclidean") == []
@@ -0,0 +1,24 @@
+"""NDJSON export filters."""
+import json
+import uuid
+
+
+def test_exclude_keyword_takes_like_wildcards_literally(client, auth_headers):
+    tag = uuid.uuid4().hex[:8]
+    heroes = [
+        client.post("/api/heroes/", headers=auth_headers, json={
+            "firstname": "Test",
+            "lastname": "Export",
+            "nickname": nickname,
+            "description": "Héros créé par les tests d'export.",
+        }).json()
+        for nickname in (f"export-{tag}", f"export-{tag}-100%")
+    ]
+    try:
+        response = client.get("/api/heroes/export", headers=auth_headers, params={"exclude_keyword": "%"})
+        exported = {json.loads(line)["id"] for line in response.text.splitlines()}
+        assert heroes[0]["id"] in exported
+        assert heroes[1]["id"] not in exported
+    finally:
+        for hero in heroes:
+            client.delete(f"/api/heroes/{hero['id']}", headers=auth_headers)
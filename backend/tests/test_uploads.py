@@ -0,0 +1,22 @@
+"""Upload size limits, enforced before the body is read."""
+import uuid
+from app.core.config import settings
+
+ORIGIN = "http://localhost:5173"
+
+
+def upload_url():
+    return f"/api/heroes/upload-image/{uuid.uuid4()}"
+
+
+def test_an_oversized_upload_gets_a_413_the_browser_can_read(client, auth_headers):
+    response = client.post(upload_url(), content=b"x", headers={
+        **auth_headers, "Origin": ORIGIN, "Content-Length": str(settings.max_upload_bytes * 2),
+    })
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+
+
+def test_a_malformed_content_length_is_a_bad_request(client, auth_headers):
+    response = client.post(upload_url(), content=b"x", headers={**auth_headers, "Content-Length": "lots"})
+    assert response.status_code == 400
@@ -1,16 +1,24 @@
 #!/usr/bin/env python3
 """
-Script pour parser l'API backend des héros et générer des commandes curl
-pour recréer les héros dans une nouvelle base de données.
+Script pour exporter les héros depuis l'API backend (flux NDJSON) et générer
+un script curl qui les réimporte dans une nouvelle base de données.
+
+L'export est complet par défaut: le script généré recrée tous les héros sur
+un nouvel environnement. Avec `--incremental`, seuls les héros créés ou
+modifiés depuis l'export précédent sont téléchargés (jeton X-Change-Token
+gardé dans .export_change_token); le script ne rejoue alors que ces
+changements, sans les suppressions, sur un environnement déjà restauré.
 """
 
 import os
 import sys
+import gzip
 import json
+import shutil
 import requests
 import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import Dict, Any, Optional
 from pathlib import Path
 
 # Chargement du fichier .env s'il existe
@@ -32,6 +40,13 @@ load_env_file()
 API_BASE = "http://127.0.0.1:8000/api"
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
 
+# Jeton de changement du dernier export réussi, pour les exports incrémentaux
+CHANGE_TOKEN_FILE = Path(__file__).parent / '.export_change_token'
+
+# Règles d'exclusion des héros de test, appliquées côté serveur par /heroes/export
+TEST_KEYWORDS = ['test', 'demo', 'example', 'sample']
+MIN_DESCRIPTION_LENGTH = 50
+
 if not ADMIN_PASSWORD:
     print("❌ ERREUR: Variable d'environnement ADMIN_PASSWORD non définie")
     print("💡 Veuillez définir ADMIN_PASSWORD dans votre fichier .env")
@@ -42,6 +57,7 @@ class HerosCurlGenerator:
         self.api_base = api_base
         self.password = password
         self.token = None
+        self.change_token = None
         self.session = requests.Session()
         
     def wait_for_api(self, max_attempts: int = 30) -> bool:
@@ -84,70 +100,60 @@ class HerosCurlGenerator:
             print(f"❌ Erreur authentification: {e}")
             return False
     
-    def get_heroes(self) -> Optional[List[Dict[str, Any]]]:
-        """Récupère la liste des héros depuis l'API"""
+    def filter_test_heroes(self) -> Dict[str, Any]:
+        """Paramètres de filtrage des héros de test pour /heroes/export"""
+        return {
+            "exclude_keyword": TEST_KEYWORDS,
+            "min_description_length": MIN_DESCRIPTION_LENGTH,
+        }
+    
+    def export_heroes(self, output_filename: str, since: Optional[str] = None) -> bool:
+        """Télécharge l'export NDJSON compressé tel quel, sans le charger en mémoire"""
+        params = {"gzip": "true", **self.filter_test_heroes()}
+        if since:
+            params["since"] = since
         try:
-            response = self.session.get(f"{self.api_base}/heroes/", timeout=10)
-            
-            if response.status_code == 200:
-                heroes = response.json()
-                print(f"📋 {len(heroes)} héros récupérés depuis l'API")
-                return heroes
-            else:
-                print(f"❌ Erreur récupération héros: {response.status_code}")
-                return None
-                
+            with self.session.get(f"{self.api_base}/heroes/export", params=params, stream=True, timeout=60) as response:
+                if response.status_code == 400 and since:
+                    print("⚠️ Jeton de changement invalide, export complet")
+                    return self.export_heroes(output_filename)
+                if response.status_code != 200:
+                    print(f"❌ Erreur export héros: {response.status_code}")
+                    return False
+                with open(output_filename, 'wb') as f:
+                    # decode_content=False: le fichier reste compressé sur le disque
+                    response.raw.decode_content = False
+                    shutil.copyfileobj(response.raw, f)
+                self.change_token = response.headers.get("X-Change-Token")
         except requests.exceptions.RequestException as e:
             print(f"❌ Erreur réseau: {e}")
-            return None
-    
-    def filter_test_heroes(self, heroes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Filtre les héros de test"""
-        filtered_heroes = []
-        test_keywords = ['test', 'demo', 'example', 'sample']
-        
-        for hero in heroes:
-            nickname = hero.get('nickname', '').lower()
-            description = hero.get('description', '')
-            
-            # Exclure si le nickname contient des mots-clés de test
-            if any(keyword in nickname for keyword in test_keywords):
-                print(f"🗑️  Exclu (test): {hero.get('nickname')}")
-                continue
-            
-            # Exclure si la description est très courte (probablement un test)
-            if len(description) < 50:
-                print(f"🗑️  Exclu (description courte): {hero.get('nickname')}")
-                continue
-            
-            print(f"✅ Inclus: {hero.get('nickname')} ({hero.get('real_name', 'N/A')})")
-            filtered_heroes.append(hero)
+            return False
         
-        print(f"📊 {len(filtered_heroes)} héros conservés, {len(heroes) - len(filtered_heroes)} exclus")
-        return filtered_heroes
+        print(f"📦 Export enregistré: {output_filename}" + (" (incrémental)" if since else ""))
+        return True
     
-    def escape_json_for_bash(self, data: Dict[str, Any]) -> str:
-        """Échappe correctement le JSON pour bash"""
-        json_str = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
-        # Échapper les caractères spéciaux pour bash
-        json_str = json_str.replace("'", "'\"'\"'")  # Échapper les apostrophes
-        json_str = json_str.replace('"', '\\"')      # Échapper les guillemets
-        return json_str
-    
-    def generate_curl_commands(self, heroes: List[Dict[str, Any]]) -> str:
-        """Génère un fichier avec les commandes curl pour recréer les héros"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def generate_curl_commands(self, export_filename: str, timestamp: str, incremental: bool = False) -> str:
+        """Génère un script qui réimporte l'export via /heroes/import"""
         output_filename = f"hero_curl_commands_{timestamp}.sh"
         
-        # En-tête du fichier
         curl_commands = [
             "#!/bin/bash",
-            "# Commandes curl pour recréer les héros",
+            "# Réimport des héros à partir d'un export NDJSON",
             f"# Généré automatiquement le {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            f"# Contient {len(heroes)} héros",
+            f"# Fichier d'export: {export_filename}",
+        ]
+        if incremental:
+            curl_commands += [
+                "# Export incrémental: à appliquer sur un environnement restauré depuis l'export précédent",
+                "# (héros créés ou modifiés seulement, les suppressions ne sont pas rejouées)",
+            ]
+        curl_commands += [
             "",
             "# Configuration",
             f'API_BASE="{self.api_base}"',
+            f'EXPORT_FILE="$(dirname "$0")/{export_filename}"',
+            "# Pour reprendre un import interrompu: SKIP=<lines_committed> ./script.sh",
+            'SKIP="${SKIP:-0}"',
             "",
             "# Chargement du fichier .env s'il existe",
             "if [ -f .env ]; then",
@@ -182,47 +188,18 @@ class HerosCurlGenerator:
             "# Authentification",
             "authenticate",
             "",
-            "echo \"🦸‍♂️ CRÉATION DES HÉROS\"",
+            "echo \"🦸‍♂️ IMPORT DES HÉROS\"",
             "echo \"========================\"",
-            ""
-        ]
-        
-        # Génération des commandes pour chaque héros
-        for i, hero in enumerate(heroes, 1):
-            nickname = hero.get('nickname', f'Hero_{i}')
-            
-            # Préparer les données du héros (sans l'ID)
-            hero_data = {k: v for k, v in hero.items() if k not in ['id', 'created_at', 'updated_at']}
-            
-            # Créer un fichier JSON temporaire pour ce héros
-            json_filename = f"hero_{i}_{timestamp}.json"
-            
-            curl_commands.extend([
-                f"# Héros {i}: {nickname}",
-                f"echo \"📝 Création de: {nickname}\"",
-                f"cat > {json_filename} << 'EOF'",
-                json.dumps(hero_data, ensure_ascii=False, indent=2),
-                "EOF",
-                "",
-                f"curl -s -X POST \"$API_BASE/heroes/\" \\",
-                f"    -H \"Authorization: Bearer $TOKEN\" \\",
-                f"    -H \"Content-Type: application/json\" \\",
-                f"    -d @{json_filename} | \\",
-                f"    python3 -c \"import sys, json; data=json.load(sys.stdin); print('✅ Créé: ' + data.get('nickname', 'N/A'))\" 2>/dev/null || echo \"❌ Erreur pour {nickname}\"",
-                "",
-                f"rm -f {json_filename}",
-                "sleep 0.5",
-                ""
-            ])
-        
-        # Pied de fichier
-        curl_commands.extend([
-            "echo \"🎉 Création terminée!\"",
             "",
-            "# Vérification finale",
-            "echo \"📊 Vérification...\"",
-            "curl -s \"$API_BASE/heroes/\" | python3 -c \"import sys, json; heroes = json.load(sys.stdin); print('Total: ' + str(len(heroes)) + ' héros dans la base')\""
-        ])
+            "curl -s -X POST \"$API_BASE/heroes/import?mode=upsert&skip=$SKIP\" \\",
+            "    -H \"Authorization: Bearer $TOKEN\" \\",
+            "    -H \"Content-Type: application/x-ndjson\" \\",
+            "    -H \"Content-Encoding: gzip\" \\",
+            "    --data-binary @\"$EXPORT_FILE\" | \\",
+            "    python3 -c \"import sys, json; r=json.load(sys.stdin); print('📊 ' + r['status'] + ': ' + str(r['created']) + ' créés, ' + str(r['updated']) + ' mis à jour, ' + str(r['failed']) + ' en erreur (lignes validées: ' + str(r['lines_committed']) + ')')\" 2>/dev/null || echo \"❌ Erreur lors de l'import\"",
+            "",
+            "echo \"🎉 Import terminé!\"",
+        ]
         
         # Écriture du fichier
         with open(output_filename, 'w', encoding='utf-8') as f:
@@ -234,24 +211,29 @@ class HerosCurlGenerator:
         print(f"🐚 Fichier curl généré: {output_filename}")
         return output_filename
     
-    def show_summary(self, heroes: List[Dict[str, Any]]):
-        """Affiche un résumé des héros qui seront recréés"""
+    def show_summary(self, export_filename: str) -> int:
+        """Affiche un résumé des héros exportés, en lisant l'export ligne par ligne"""
         print(f"\n{'='*60}")
-        print(f"📊 RÉSUMÉ DES HÉROS À RECRÉER ({len(heroes)} héros)")
+        print(f"📊 RÉSUMÉ DES HÉROS À RECRÉER")
         print(f"{'='*60}")
         
-        for i, hero in enumerate(heroes, 1):
-            skills_count = len(hero.get('skills', {}))
-            desc_length = len(hero.get('description', ''))
-            
-            print(f"\n{i}. {hero.get('nickname', 'N/A')}")
-            print(f"   👤 {hero.get('real_name', 'N/A')}")
-            print(f"   📝 Description: {desc_length} caractères")
-            print(f"   🎯 Compétences: {skills_count}")
-            
-            if hero.get('skills'):
-                skills_str = ', '.join([f"{k}:{v}" for k, v in hero['skills'].items()])
-                print(f"      {skills_str}")
+        count = 0
+        with gzip.open(export_filename, 'rt', encoding='utf-8') as f:
+            for count, line in enumerate(f, 1):
+                hero = json.loads(line)
+                skills = hero.get('skills') or {}
+                
+                print(f"\n{count}. {hero.get('nickname', 'N/A')}")
+                print(f"   👤 {hero.get('firstname', '')} {hero.get('lastname', '')}")
+                print(f"   📝 Description: {len(hero.get('description', ''))} caractères")
+                print(f"   🎯 Compétences: {len(skills)}")
+                
+                if skills:
+                    skills_str = ', '.join([f"{k}:{v}" for k, v in skills.items()])
+                    print(f"      {skills_str}")
+        
+        print(f"\n📊 {count} héros exportés")
+        return count
 
 def main():
     """Fonction principale"""
@@ -269,23 +251,32 @@ def main():
         sys.exit(1)
     print("✅ Authentification réussie")
     
-    # Récupérer les héros
-    all_heroes = generator.get_heroes()
-    if not all_heroes:
-        print("❌ Aucun héros trouvé")
+    # Exporter les héros (les héros de test sont filtrés par l'API)
+    since = None
+    if "--incremental" in sys.argv:
+        if not CHANGE_TOKEN_FILE.exists():
+            print("❌ Aucun export précédent (.export_change_token absent): lancez d'abord un export complet")
+            sys.exit(1)
+        since = CHANGE_TOKEN_FILE.read_text(encoding='utf-8').strip() or None
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    export_file = f"heroes_export_{timestamp}.ndjson.gz"
+    if not generator.export_heroes(export_file, since):
         sys.exit(1)
     
-    # Filtrer les héros de test
-    heroes = generator.filter_test_heroes(all_heroes)
-    if not heroes:
+    # Afficher le résumé
+    count = generator.show_summary(export_file)
+    if generator.change_token:
+        CHANGE_TOKEN_FILE.write_text(generator.change_token, encoding='utf-8')
+    if not count:
+        if since:
+            print("✅ Aucun héros modifié depuis le dernier export")
+            os.remove(export_file)
+            return
         print("❌ Aucun héros valide après filtrage")
         sys.exit(1)
     
-    # Générer le fichier de commandes curl
-    curl_file = generator.generate_curl_commands(heroes)
-    
-    # Afficher le résumé
-    generator.show_summary(heroes)
+    # Générer le script de réimport
+    curl_file = generator.generate_curl_commands(export_file, timestamp, incremental=since is not None)
     
     print(f"\n✨ Génération terminée avec succès!")
     print(f"📄 Fichier curl: {curl_file}")
@@ -68,25 +68,28 @@ def get_auth_token():
         print(f"Impossible de se connecter à l'API: {e}")
         return None
 
-def create_hero(token, hero_data):
-    """Crée un héros via l'API"""
+def create_heroes(token, heroes_data):
+    """Crée tous les héros en une seule requête (transaction unique côté API)"""
     try:
         response = requests.post(
-            f"{API_BASE}/heroes/",
-            json=hero_data,
+            f"{API_BASE}/heroes/bulk",
+            json={"mode": "create", "heroes": heroes_data},
             headers={"Authorization": f"Bearer {token}"},
-            timeout=10
+            timeout=60
         )
-        if response.status_code == 200:
-            hero = response.json()
-            print(f"✅ Héros créé: {hero['nickname']} ({hero['firstname']} {hero['lastname']})")
-            return True
-        else:
-            print(f"❌ Erreur création {hero_data['nickname']}: {response.status_code}")
-            return False
+        if response.status_code != 200:
+            print(f"❌ Erreur création en masse: {response.status_code}")
+            return 0
+        report = response.json()
+        for item in report["items"]:
+            if item["status"] == "created":
+                print(f"✅ Héros créé: {item['nickname']}")
+            else:
+                print(f"⚠️  Ignoré ({item['status']}): {item['nickname']}")
+        return report["created"]
     except Exception as e:
-        print(f"❌ Erreur réseau pour {hero_data['nickname']}: {e}")
-        return False
+        print(f"❌ Erreur réseau: {e}")
+        return 0
 
 def main():
     """Fonction principale"""
@@ -116,11 +119,7 @@ def main():
     print("✅ Authentification réussie")
     
     # Création des héros
-    created = 0
-    for hero_data in HEROES_DATA:
-        if create_hero(token, hero_data):
-            created += 1
-        time.sleep(0.5)  # Petit délai entre les créations
+    created = create_heroes(token, HEROES_DATA)
     
     print(f"🎉 {created}/{len(HEROES_DATA)} héros créés avec succès!")
 
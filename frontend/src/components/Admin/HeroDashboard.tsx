@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { Hero, heroesApi } from '../../services/api';
+import { Hero, heroesApi, heroImageUrl } from '../../services/api';
 import { useAuth } from '../../context/AuthContext';
 import HeroForm from './HeroForm';
 
@@ -67,8 +67,9 @@ const HeroDashboard: React.FC = () => {
     setEditingHero(undefined);
   };
 
-  const handleLogout = () => {
-    logout();
+  const handleLogout = async () => {
+    // Leaving the page would abort the revocation request
+    await logout();
     window.location.href = '/admin';
   };
 
@@ -182,7 +183,7 @@ const HeroDashboard: React.FC = () => {
                   <div className="w-16 h-16 rounded-full overflow-hidden bg-gray-800 border-2 border-cyprine-cyan/30">
                     {hero.profile_picture ? (
                       <img
-                        src={`http://localhost:8000${hero.profile_picture}`}
+                        src={heroImageUrl(hero, 'thumb')}
                         alt={hero.nickname}
                         className="hero-img hero-img--sm"
                       />
@@ -1,5 +1,5 @@
 import React from 'react';
-import { Hero } from '../services/api';
+import { Hero, heroImageUrl } from '../services/api';
 
 interface HeroCardProps {
   hero: Hero;
@@ -31,7 +31,7 @@ const HeroCard: React.FC<HeroCardProps> = ({ hero, isSelected, onClick, onDragSt
       <div className="relative mb-3 overflow-hidden rounded-lg aspect-square bg-gray-800">
         {hero.profile_picture ? (
           <img
-            src={`http://localhost:8000${hero.profile_picture}`}
+            src={heroImageUrl(hero, 'card')}
             alt={hero.nickname}
             className="hero-img hero-img--md"
           />
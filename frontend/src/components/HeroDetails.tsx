@@ -1,5 +1,5 @@
 import React from 'react';
-import { Hero } from '../services/api';
+import { Hero, heroImageUrl } from '../services/api';
 
 interface HeroDetailsProps {
   hero: Hero | null;
@@ -43,7 +43,7 @@ const HeroDetails: React.FC<HeroDetailsProps> = ({ hero }) => {
           <div className="w-32 h-32 rounded-full overflow-hidden bg-gray-800 border-4 border-cyprine-cyan shadow-lg shadow-cyprine-cyan/30">
             {hero.profile_picture ? (
               <img
-                src={`http://localhost:8000${hero.profile_picture}`}
+                src={heroImageUrl(hero, 'card')}
                 alt={hero.nickname}
                 className="hero-img hero-img--md"
               />
@@ -1,5 +1,5 @@
 import React from 'react';
-import { Hero } from '../services/api';
+import { Hero, heroImageUrl } from '../services/api';
 
 interface TeamCompositionProps {
   team: (Hero | null)[];
@@ -51,7 +51,7 @@ const TeamComposition: React.FC<TeamCompositionProps> = ({
                 }`}>
                   {hero.profile_picture ? (
                     <img
-                      src={`http://localhost:8000${hero.profile_picture}`}
+                      src={heroImageUrl(hero, 'thumb')}
                       alt={hero.nickname}
                       className="hero-img hero-img--xs"
                     />
@@ -128,11 +128,7 @@ const TeamComposition: React.FC<TeamCompositionProps> = ({
 
   const teamStrength = team
     .filter(hero => hero !== null)
-    .reduce((total, hero) => {
-      const skillValues = Object.values(hero!.skills).map(Number);
-      const avgSkill = skillValues.length > 0 ? skillValues.reduce((a, b) => a + b, 0) / skillValues.length : 0;
-      return total + avgSkill;
-    }, 0);
+    .reduce((total, hero) => total + (hero!.avg_skill ?? 0), 0);
 
   return (
     <div className={`
@@ -4,7 +4,7 @@ import { authApi } from '../services/api';
 interface AuthContextType {
   isAuthenticated: boolean;
   login: (password: string) => Promise<boolean>;
-  logout: () => void;
+  logout: () => Promise<void>;
   loading: boolean;
 }
 
@@ -46,9 +46,16 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
     }
   };
 
-  const logout = () => {
-    localStorage.removeItem('auth_token');
-    setIsAuthenticated(false);
+  const logout = async () => {
+    // Revoke the token server-side while it is still sent; the local session ends either way
+    try {
+      await authApi.logout();
+    } catch (error) {
+      console.error('Logout failed:', error);
+    } finally {
+      localStorage.removeItem('auth_token');
+      setIsAuthenticated(false);
+    }
   };
 
   const value = {
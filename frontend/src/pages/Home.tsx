@@ -17,6 +17,27 @@ const Home: React.FC = () => {
   // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
+  // Apply the changes pushed by the server instead of polling the whole list
+  useEffect(() => {
+    return heroesApi.subscribe(async ({ type, ids }) => {
+      if (type === 'reset') {
+        loadHeroes();
+        return;
+      }
+      if (type === 'deleted') {
+        setHeroes((current) => current.filter((hero) => !ids.includes(hero.id)));
+        return;
+      }
+      const changed = await Promise.all(ids.map((id) => heroesApi.getById(id).then((r) => r.data, () => null)));
+      setHeroes((current) => {
+        const byId = new Map(current.map((hero) => [hero.id, hero]));
+        changed.forEach((hero) => hero && byId.set(hero.id, hero));
+        return Array.from(byId.values());
+      });
+    });
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
   const loadHeroes = async () => {
     try {
       setLoading(true);
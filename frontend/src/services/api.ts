@@ -2,6 +2,8 @@ import axios from 'axios';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 
+export type HeroImageVariant = 'thumb' | 'card' | 'detail';
+
 export interface Hero {
   id: string;
   firstname: string;
@@ -9,7 +11,11 @@ export interface Hero {
   nickname: string;
   description: string;
   profile_picture?: string;
+  profile_picture_variants?: Record<HeroImageVariant, Record<'webp' | 'jpeg', string>>;
   skills: Record<string, number>;
+  // Computed by the database from skills
+  avg_skill?: number;
+  max_skill?: number;
   created_at: string;
   updated_at?: string;
 }
@@ -25,6 +31,30 @@ export interface HeroCreate {
 
 export interface HeroUpdate extends Partial<HeroCreate> {}
 
+export interface HeroBatch {
+  heroes: Hero[];
+  missing: string[];
+}
+
+export interface SimilarHeroes {
+  metric: 'cosine' | 'euclidean';
+  heroes: { id: string; nickname: string; score: number }[];
+}
+
+export interface HeroChanges {
+  heroes: Hero[];
+  deleted: string[];
+  next: string;
+  has_more: boolean;
+}
+
+export type HeroEventType = 'created' | 'updated' | 'deleted' | 'image' | 'reset';
+
+export interface HeroEvent {
+  type: HeroEventType;
+  ids: string[];
+}
+
 export interface LoginRequest {
   password: string;
 }
@@ -34,6 +64,12 @@ export interface TokenResponse {
   token_type: string;
 }
 
+// Smallest generated derivative for the rendered size, falling back to the original upload
+export const heroImageUrl = (hero: Hero, variant: HeroImageVariant): string => {
+  const path = hero.profile_picture_variants?.[variant]?.webp ?? hero.profile_picture;
+  return `http://localhost:8000${path}`;
+};
+
 const api = axios.create({
   baseURL: API_BASE_URL,
 });
@@ -48,24 +84,114 @@ api.interceptors.request.use((config) => {
 });
 
 // Heroes API
+export interface HeroListParams {
+  cursor?: string;
+  limit?: number;
+  nickname?: string;
+  lastname?: string;
+  created_after?: string;
+  created_before?: string;
+  updated_after?: string;
+  updated_before?: string;
+  min_avg_skill?: number;
+  order_by?: 'created_at' | 'avg_skill' | 'max_skill';
+  fields?: string;
+}
+
 export const heroesApi = {
-  getAll: () => api.get<Hero[]>('/heroes'),
+  getPage: (params: HeroListParams = {}) => api.get<Hero[]>('/heroes', { params }),
+  // Follows the X-Next-Cursor header until every page has been fetched
+  getAll: async (params: Omit<HeroListParams, 'cursor'> = {}) => {
+    const heroes: Hero[] = [];
+    let cursor: string | undefined;
+    do {
+      const response = await heroesApi.getPage({ limit: 200, ...params, cursor });
+      heroes.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return { data: heroes };
+  },
   getById: (id: string) => api.get<Hero>(`/heroes/${id}`),
+  // Several heroes in one round trip, in the order of `ids`
+  getMany: (ids: string[]) => api.post<HeroBatch>('/heroes/batch', { ids }),
+  // Delta sync: heroes written and ids deleted since the `next` token of the previous call
+  changes: (since?: string) => api.get<HeroChanges>('/heroes/changes', { params: { since } }),
+  // Heroes with the closest skill profiles: cosine similarity (higher first) or euclidean distance (lower first)
+  similar: (id: string, k = 10, metric: SimilarHeroes['metric'] = 'cosine') =>
+    api.get<SimilarHeroes>(`/heroes/${id}/similar`, { params: { k, metric } }),
   create: (hero: HeroCreate) => api.post<Hero>('/heroes', hero),
   update: (id: string, hero: HeroUpdate) => api.put<Hero>(`/heroes/${id}`, hero),
+  // Partial update; with the ETag of the hero as read, fails with 412 if it changed since
+  patch: (id: string, hero: HeroUpdate, etag?: string) =>
+    api.patch<Hero>(`/heroes/${id}`, hero, etag ? { headers: { 'If-Match': etag } } : undefined),
   delete: (id: string) => api.delete(`/heroes/${id}`),
+  // Change feed; EventSource reconnects by itself and resumes with Last-Event-ID.
+  // `reset` means events were missed and the list must be reloaded. Returns the unsubscribe function.
+  subscribe: (onEvent: (event: HeroEvent) => void) => {
+    const source = new EventSource(`${API_BASE_URL}/heroes/events`);
+    const types: HeroEventType[] = ['created', 'updated', 'deleted', 'image', 'reset'];
+    types.forEach((type) =>
+      source.addEventListener(type, (e) => onEvent({ type, ids: JSON.parse((e as MessageEvent).data).ids })),
+    );
+    return () => source.close();
+  },
   uploadImage: (heroId: string, file: File) => {
     const formData = new FormData();
     formData.append('file', file);
-    return api.post(`/heroes/upload-image/${heroId}`, formData, {
+    return api.post<{ message: string; filename: string; job_id: string }>(`/heroes/upload-image/${heroId}`, formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
   },
 };
 
+// Teams API
+export interface TeamOptimizeRequest {
+  size?: number;
+  required?: string[];
+  excluded?: string[];
+  weights?: Record<string, number>;
+  min_coverage?: Record<string, number>;
+  top_k?: number;
+}
+
+export interface OptimizedTeam {
+  score: number;
+  members: { id: string; nickname: string; score: number }[];
+  coverage: Record<string, number>;
+}
+
+export const teamsApi = {
+  optimize: (constraints: TeamOptimizeRequest) =>
+    api.post<{ teams: OptimizedTeam[]; candidates: number; explored: number; exhaustive: boolean }>(
+      '/teams/optimize',
+      constraints,
+    ),
+};
+
+// Jobs API
+export interface Job {
+  id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  progress: number;
+  attempts: number;
+  max_attempts: number;
+  result: Record<string, unknown> | null;
+  error: string | null;
+  run_after: string;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
+export const jobsApi = {
+  get: (id: string) => api.get<Job>(`/jobs/${id}`),
+};
+
 // Auth API
 export const authApi = {
   login: (credentials: LoginRequest) => api.post<TokenResponse>('/auth/login', credentials),
+  logout: () => api.post('/auth/logout'),
 };
 
 export default api;
\ No newline at end of file